@@ -0,0 +1,22 @@
+import json
+import os
+
+
+def atomic_write(path, text, tmp_suffix=".tmp"):
+    """Write `text` to `path` through a temporary file, so readers never see half of it
+
+    Processes that share `path` pass a `tmp_suffix` of their own, such as
+    one with the pid in it.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}{tmp_suffix}"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def atomic_write_json(path, data, tmp_suffix=".tmp", **dump_options):
+    """atomic_write() of `data` as JSON; `dump_options` go to json.dumps"""
+    atomic_write(path, json.dumps(data, **dump_options), tmp_suffix)
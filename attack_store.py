@@ -0,0 +1,134 @@
+import asyncio
+import json
+import logging
+import os
+from atomic_file import atomic_write_json
+from config import *
+
+logger = logging.getLogger(__name__)
+
+# one store per file, shared by every account in the process
+_stores = {}
+
+
+def get_attack_store(path=ATTACK_CONFIG_FILE):
+    """The shared store for `path`, created on first use"""
+    store = _stores.get(path)
+    if store is None:
+        store = _stores[path] = AttackConfigStore(path)
+    return store
+
+
+class AttackConfigStore:
+    """Attack choices keyed by user ID, kept in memory and written behind
+
+    Changes are coalesced for `flush_delay` seconds and written atomically off
+    the event loop. Only the keys changed here are merged into what is on disk,
+    so worker processes sharing the file do not undo each other's changes.
+    """
+
+    def __init__(self, path, flush_delay=ATTACK_CONFIG_FLUSH_DELAY):
+        self.path = path
+        self.flush_delay = flush_delay
+        self.entries = {}
+        self.dirty_keys = set()
+        self.flush_handle = None
+        self.flush_task = None
+        self.writes = 0
+        self.load()
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    self.entries = json.load(f)
+                logger.info(f"attack config loaded ({len(self.entries)} entries)")
+            else:
+                logger.info("no attack config found")
+        except Exception as e:
+            logger.error(f"error loading attack config: {e}")
+            self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, attack_name, row=None, col=None, move=None):
+        """Choose a button by position, or by move name with `move`"""
+        entry = {'row': row, 'col': col, 'attack_name': attack_name}
+        if move:
+            entry['move'] = move
+        self.entries[key] = entry
+        self.dirty_keys.add(key)
+        self.schedule_flush()
+
+    def schedule_flush(self):
+        """Write once `flush_delay` after the first unsaved change"""
+        if self.flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self.flush_handle = loop.call_later(self.flush_delay, self.flush_in_background)
+
+    def flush_in_background(self):
+        self.flush_handle = None
+        if self.flush_task is not None and not self.flush_task.done():
+            # one write at a time, both use the same temporary file
+            self.schedule_flush()
+            return
+        entries, keys = self.take_pending()
+        if keys:
+            self.flush_task = asyncio.ensure_future(asyncio.to_thread(self.write, entries, keys))
+            self.flush_task.add_done_callback(self.flush_done)
+
+    def flush_done(self, task):
+        # runs on the loop thread, the only one that touches dirty_keys
+        if not task.cancelled() and task.exception() is None:
+            self.dirty_keys.update(task.result())
+        # changes made meanwhile, or keys a failed write gave back
+        if self.dirty_keys:
+            self.schedule_flush()
+
+    async def close(self):
+        """Wait for a running background write, then write what is left"""
+        if self.flush_task is not None:
+            try:
+                await self.flush_task
+            except Exception as e:
+                logger.error(f"Error saving attack config: {e}")
+        self.flush()
+
+    def flush(self):
+        """Write pending changes now (used on shutdown, after any background write)"""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        entries, keys = self.take_pending()
+        if keys:
+            self.dirty_keys.update(self.write(entries, keys))
+
+    def take_pending(self):
+        keys = self.dirty_keys
+        self.dirty_keys = set()
+        return {key: self.entries[key] for key in keys}, keys
+
+    def write(self, entries, keys):
+        """Merge `entries` into the file; the keys that could not be saved, empty on success
+
+        Runs on a worker thread, so it leaves dirty_keys to the caller.
+        """
+        try:
+            on_disk = {}
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    on_disk = json.load(f)
+            on_disk.update(entries)
+            atomic_write_json(self.path, on_disk, f".{os.getpid()}.tmp", separators=(',', ':'))
+            self.writes += 1
+            return set()
+        except Exception as e:
+            logger.error(f"Error saving attack config: {e}")
+            # kept for the next flush
+            return keys
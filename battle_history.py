@@ -0,0 +1,195 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+from config import *
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS battles (
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    turns INTEGER NOT NULL,
+    duration REAL NOT NULL
+)
+"""
+# one row per battle turn whose damage could be read off, for the move policy
+_TURNS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    ts REAL NOT NULL,
+    move TEXT NOT NULL,
+    hp INTEGER NOT NULL,
+    damage INTEGER NOT NULL
+)
+"""
+_INSERTS = {
+    'battles': "INSERT INTO battles VALUES (?, ?, ?, ?, ?)",
+    'turns': "INSERT INTO turns VALUES (?, ?, ?, ?)",
+}
+
+
+class BattleHistory:
+    """Append-only record of finished battles with running totals
+
+    Rows go to SQLite from a background thread, so recording never blocks the
+    event loop. Totals and the last-hour window are kept up to date as rows
+    are recorded, so reading them never touches the database.
+    """
+
+    def __init__(self, path, window=HISTORY_WINDOW, clock=time.time):
+        self.path = path
+        self.window = window
+        self.clock = clock
+        self.totals = Counter()
+        self.recent = deque()
+        self.recent_totals = Counter()
+        self.first_ts = None
+        self.queue = queue.SimpleQueue()
+        self.writer = None
+        self.load()
+
+    def load(self):
+        """Rebuild the totals from earlier runs, once at startup"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            conn = sqlite3.connect(self.path)
+            try:
+                conn.execute(_SCHEMA)
+                for kind, count, amount, turns, duration, first in conn.execute(
+                        "SELECT kind, COUNT(*), SUM(amount), SUM(turns), SUM(duration), MIN(ts) "
+                        "FROM battles GROUP BY kind"):
+                    self.add_totals(self.totals, kind, count, amount, turns, duration)
+                    self.first_ts = first if self.first_ts is None else min(self.first_ts, first)
+                since = self.clock() - self.window
+                for row in conn.execute("SELECT ts, kind, amount FROM battles WHERE ts >= ? ORDER BY ts", (since,)):
+                    self.add_recent(*row)
+            finally:
+                conn.close()
+            logger.info(f"📜 Battle history loaded: {self.totals['battles']} battles, {self.totals['money']} 💵")
+        except Exception as e:
+            logger.error(f"error loading battle history: {e}")
+
+    @staticmethod
+    def add_totals(totals, kind, count, amount, turns, duration):
+        totals[kind] += count
+        totals['money'] += amount or 0
+        if kind in ('prize', 'forfeit'):
+            totals['battles'] += count
+            totals['turns'] += turns or 0
+            totals['duration'] += duration or 0
+
+    def add_recent(self, ts, kind, amount):
+        self.recent.append((ts, kind, amount))
+        self.add_totals(self.recent_totals, kind, 1, amount, 0, 0)
+
+    def trim_recent(self, now):
+        cutoff = now - self.window
+        while self.recent and self.recent[0][0] < cutoff:
+            _, kind, amount = self.recent.popleft()
+            self.add_totals(self.recent_totals, kind, -1, -amount, 0, 0)
+
+    def record(self, kind, amount=0, turns=0, duration=0.0):
+        """Queue one row ('prize', 'forfeit' or 'daily_limit') and fold it into the totals"""
+        ts = self.clock()
+        if self.first_ts is None:
+            self.first_ts = ts
+        self.add_totals(self.totals, kind, 1, amount, turns, duration)
+        self.add_recent(ts, kind, amount)
+        self.trim_recent(ts)
+        self.write('battles', (ts, kind, amount, turns, duration))
+
+    def record_turn(self, move, hp, damage):
+        """Queue the damage `move` did to a Blissey that had `hp` left"""
+        self.write('turns', (self.clock(), move, hp, damage))
+
+    def write(self, table, row):
+        if self.writer is None:
+            self.writer = threading.Thread(target=self.write_rows, name=f"history {self.path}", daemon=True)
+            self.writer.start()
+        self.queue.put((table, row))
+
+    def recorded_turns(self, limit=None):
+        """(move, damage) of recorded turns, oldest first; the newest `limit` if given"""
+        if not os.path.exists(self.path):
+            return []
+        try:
+            conn = sqlite3.connect(self.path)
+            try:
+                conn.execute(_TURNS_SCHEMA)
+                rows = conn.execute("SELECT move, damage FROM turns ORDER BY rowid DESC LIMIT ?",
+                                    (-1 if limit is None else limit,)).fetchall()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.error(f"error reading recorded turns: {e}")
+            return []
+        rows.reverse()
+        return rows
+
+    def write_rows(self):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path)
+            conn.execute(_SCHEMA)
+            conn.execute(_TURNS_SCHEMA)
+        except Exception as e:
+            logger.error(f"Error opening battle history: {e}")
+            return
+        running = True
+        while running:
+            rows = [self.queue.get()]
+            # whatever piled up meanwhile goes into the same transaction
+            while True:
+                try:
+                    rows.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in rows:
+                running = False
+                rows = [row for row in rows if row is not None]
+            try:
+                with conn:
+                    for table, insert in _INSERTS.items():
+                        table_rows = [row for name, row in rows if name == table]
+                        if table_rows:
+                            conn.executemany(insert, table_rows)
+            except Exception as e:
+                logger.error(f"Error writing battle history: {e}")
+        conn.close()
+
+    def close(self):
+        """Write out everything queued"""
+        if self.writer is not None:
+            self.queue.put(None)
+            self.writer.join(timeout=5)
+            self.writer = None
+
+    def summary(self):
+        """Aggregates for /stats, without touching the database"""
+        now = self.clock()
+        self.trim_recent(now)
+        totals = self.totals
+        battles = totals['battles']
+        hours = max(now - self.first_ts, 1.0) / 3600 if self.first_ts is not None else 0
+        return {
+            'battles': battles,
+            'prizes': totals['prize'],
+            'forfeits': totals['forfeit'],
+            'daily_limits': totals['daily_limit'],
+            'money': totals['money'],
+            'battles_per_hour': battles / hours if hours else 0.0,
+            'money_per_hour': totals['money'] / hours if hours else 0.0,
+            'last_hour_battles': self.recent_totals['battles'],
+            'last_hour_money': self.recent_totals['money'],
+            'forfeit_rate': totals['forfeit'] / battles if battles else 0.0,
+            'avg_turns': totals['turns'] / battles if battles else 0.0,
+            'avg_duration': totals['duration'] / battles if battles else 0.0,
+        }
@@ -0,0 +1,141 @@
+import re
+from classifier import CLICK_KINDS, EventKind, classify
+from config import PRIZE_PATTERN
+
+# the wild Pokemon every post is about
+OPPONENT_NAME = "Blissey"
+
+# numbers are capped so a garbled message cannot hand int() thousands of digits
+_PRIZE_AMOUNT = re.compile(re.escape(PRIZE_PATTERN) + r'\s*(\d[\d,]{0,15})(?![\d,])', re.IGNORECASE)
+_PENALTY_AMOUNT = re.compile(r'loses\s+(\d[\d,]{0,15})(?![\d,])', re.IGNORECASE)
+# a Pokemon block is "Wild Blissey Lv. 100 [Normal]\nHP 714/714" or
+# "Current turn: Lucario Lv. 100 [Fighting/Steel]\nHP 344/344"
+_OWN_PREFIX = "Current turn: "
+_WILD_PREFIX = "Wild "
+
+
+def _amount(pattern, text):
+    match = pattern.search(text or "")
+    return int(match.group(1).replace(',', '')) if match else 0
+
+
+def prize_amount(text):
+    """1250 for "Prize: 1,250 💵", 0 if there is none"""
+    return _amount(_PRIZE_AMOUNT, text)
+
+
+def penalty_amount(text):
+    """15 for "... forfeits and loses 15 💵", 0 if there is none"""
+    return _amount(_PENALTY_AMOUNT, text)
+
+
+class BattleMessage:
+    """One HeXamonbot message, parsed once: what happened and the numbers in it
+
+    Fields the message does not carry stay None (0 for prize and penalty).
+    "own" is the account's Pokemon, the one whose turn it is.
+    """
+
+    __slots__ = ('kind', 'opponent_move', 'opponent_hp', 'opponent_max_hp',
+                 'own_name', 'own_move', 'own_hp', 'own_max_hp', 'prize', 'penalty')
+
+    def __init__(self, kind, opponent_move=None, opponent_hp=None, opponent_max_hp=None,
+                 own_name=None, own_move=None, own_hp=None, own_max_hp=None, prize=0, penalty=0):
+        self.kind = kind
+        self.opponent_move = opponent_move
+        self.opponent_hp = opponent_hp
+        self.opponent_max_hp = opponent_max_hp
+        self.own_name = own_name
+        self.own_move = own_move
+        self.own_hp = own_hp
+        self.own_max_hp = own_max_hp
+        self.prize = prize
+        self.penalty = penalty
+
+    def describe(self):
+        parts = [self.kind.value]
+        if self.opponent_hp is not None:
+            parts.append(f"{OPPONENT_NAME} HP {self.opponent_hp}" +
+                         (f"/{self.opponent_max_hp}" if self.opponent_max_hp else ""))
+        if self.opponent_move:
+            parts.append(f"{OPPONENT_NAME} used {self.opponent_move}")
+        if self.own_move:
+            parts.append(f"{self.own_name} used {self.own_move}")
+        if self.own_hp is not None:
+            parts.append(f"{self.own_name} HP {self.own_hp}/{self.own_max_hp}")
+        if self.prize:
+            parts.append(f"prize {self.prize}")
+        if self.penalty:
+            parts.append(f"penalty {self.penalty}")
+        return ", ".join(parts)
+
+    def __repr__(self):
+        return f"BattleMessage({self.describe()})"
+
+
+def parse_message(text):
+    """Parse a HeXamonbot message; only the parts its kind can contain are looked for"""
+    kind = classify(text)
+    parsed = BattleMessage(kind)
+    if kind is EventKind.PRIZE:
+        parsed.prize = prize_amount(text)
+        _parse_turn(parsed, text)
+    elif kind is EventKind.FORFEIT:
+        parsed.penalty = penalty_amount(text)
+    elif kind in CLICK_KINDS or kind is EventKind.OTHER:
+        # OTHER covers turns without a Blissey move, e.g. a stat change
+        _parse_turn(parsed, text)
+    return parsed
+
+
+def _hp(line):
+    """(214, 714) for "HP 214/714", None for anything else"""
+    if not line.startswith("HP "):
+        return None
+    hp, slash, max_hp = line[3:].rstrip().partition("/")
+    if not slash or not 0 < len(hp) <= 9 or not 0 < len(max_hp) <= 9 or not (hp + max_hp).isdecimal():
+        return None
+    return int(hp), int(max_hp)
+
+
+def _parse_turn(parsed, text):
+    # one pass over the lines with str methods; a regex per field rescanned every line
+    if not text or ' used ' not in text and 'HP ' not in text and ' fainted!' not in text:
+        return
+    lines = text.split("\n")
+    for index, line in enumerate(lines):
+        if line.endswith(" fainted!"):
+            if line[:-9] == OPPONENT_NAME:
+                parsed.opponent_hp = 0
+            continue
+        name, used, move = line.partition(" used ")
+        if used and name:
+            move = move.partition("!")
+            if move[1] and move[0]:
+                if name == OPPONENT_NAME:
+                    parsed.opponent_move = move[0]
+                else:
+                    parsed.own_name = parsed.own_name or name
+                    parsed.own_move = move[0]
+            continue
+        name, level, rest = line.partition(" Lv. ")
+        if not level or not name or not rest[:1].isdecimal():
+            continue
+        # the HP line follows, maybe after blank lines
+        hp = None
+        for following in lines[index + 1:]:
+            following = following.strip()
+            if following:
+                hp = _hp(following)
+                break
+        if hp is None:
+            continue
+        own = name.startswith(_OWN_PREFIX)
+        if own:
+            name = name[len(_OWN_PREFIX):]
+        elif name.startswith(_WILD_PREFIX):
+            name = name[len(_WILD_PREFIX):]
+        if own or name != OPPONENT_NAME:
+            parsed.own_name, (parsed.own_hp, parsed.own_max_hp) = name, hp
+        else:
+            parsed.opponent_hp, parsed.opponent_max_hp = hp
@@ -0,0 +1,65 @@
+import asyncio
+import enum
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BattleState(enum.Enum):
+    IDLE = "idle"
+    CHALLENGE_SENT = "challenge_sent"
+    IN_BATTLE = "in_battle"
+    COOLDOWN = "cooldown"
+    DAILY_LIMITED = "daily_limited"
+
+
+class BattleStateMachine:
+    """Battle state plus the one cancellable timer that drives the next action"""
+
+    def __init__(self, name="battle"):
+        self.name = name
+        self.state = BattleState.IDLE
+        self.entered_at = time.monotonic()
+        self.transitions = 0
+        self._timer = None
+        self._timer_label = None
+
+    def transition(self, new_state, reason):
+        old_state = self.state
+        now = time.monotonic()
+        logger.info(f"🔀 [{self.name}] {old_state.value} -> {new_state.value} ({reason}, "
+                    f"after {now - self.entered_at:.1f}s)")
+        self.state = new_state
+        self.entered_at = now
+        self.transitions += 1
+
+    def schedule(self, delay, action, label):
+        """Run `action()` after `delay` seconds, replacing any pending timer"""
+        self.cancel_timer()
+        self._timer_label = label
+        self._timer = asyncio.create_task(self._run_timer(delay, action, label))
+
+    def cancel_timer(self):
+        timer = self._timer
+        self._timer = None
+        # a timer that reschedules from inside its own action must not cancel itself
+        if timer and not timer.done() and timer is not asyncio.current_task():
+            timer.cancel()
+            logger.info(f"⏹️ [{self.name}] cancelled pending {self._timer_label}")
+
+    @property
+    def pending(self):
+        if self._timer and not self._timer.done():
+            return self._timer_label
+        return None
+
+    async def _run_timer(self, delay, action, label):
+        try:
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await action()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ [{self.name}] {label} failed: {e}")
@@ -0,0 +1,66 @@
+"""Memory per account when N simulated accounts share one process
+
+Each N runs in a fresh interpreter, in a temporary directory for the session
+files. Accounts never connect, so the figure covers the bot and Telethon
+client objects themselves.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def rss_kb():
+    with open('/proc/self/statm') as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+def measure(count):
+    import logging
+    from runner import MultiAccountRunner
+    logging.disable(logging.INFO)
+    os.chdir(tempfile.mkdtemp(prefix="blissey-bench-"))
+
+    accounts = [{
+        'name': f"sim{i}",
+        'api_id': 1,
+        'api_hash': "0" * 32,
+        'session_string': "",
+        'attack_row': 1,
+        'attack_col': 0,
+    } for i in range(count)]
+
+    before = rss_kb()
+    tracemalloc.start()
+    runner = MultiAccountRunner(accounts)
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    after = rss_kb()
+    assert len(runner.bots) == count
+    print(f"{count:>4} accounts: rss +{after - before:>7} KiB "
+          f"({(after - before) / count:>6.0f} KiB/account), "
+          f"python heap {traced / 1024 / count:>6.0f} KiB/account")
+
+
+def run():
+    baseline = subprocess.run(
+        [sys.executable, "-c", "import sys; sys.path.insert(0, %r); import runner; "
+         "print(open('/proc/self/statm').read().split()[1])" % ROOT],
+        capture_output=True, text=True, check=True)
+    pages = int(baseline.stdout.split()[-1])
+    print(f"interpreter + telethon import: {pages * os.sysconf('SC_PAGE_SIZE') // 1024} KiB "
+          f"(paid once per process instead of once per account)")
+    for count in (1, 10, 50):
+        subprocess.run([sys.executable, __file__, str(count)], check=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        measure(int(sys.argv[1]))
+    else:
+        run()
@@ -0,0 +1,51 @@
+"""Microbenchmark: old if/elif substring chain vs the compiled classifier"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import *
+from classifier import EventKind, classify
+from corpus import BOT_MESSAGES
+
+
+def legacy_classify(text):
+    # the branch chain process_message used before the classifier
+    if "forfeits" in text.lower() or "has not moved" in text.lower():
+        pass
+    if BATTLE_START_PATTERN.lower() in text.lower():
+        return EventKind.BATTLE_START
+    elif BLISSEY_SWITCH_PATTERN.lower() in text.lower():
+        return EventKind.BLISSEY_SWITCH
+    elif BLISSEY_DOUBLE_EDGE_PATTERN.lower() in text.lower():
+        return EventKind.BLISSEY_MOVE
+    elif (FORFEIT_PATTERN.lower() in text.lower() or
+          "has not moved" in text.lower() and "forfeits" in text.lower() and "loses 15" in text.lower()):
+        return EventKind.FORFEIT
+    elif CURRENTLY_BATTLING_PATTERN.lower() in text.lower():
+        return EventKind.CURRENTLY_BATTLING
+    elif "Daily limit for battling has been reached" in text and "no prize will be given" in text:
+        return EventKind.DAILY_LIMIT
+    elif PRIZE_PATTERN.lower() in text.lower() and "💵" in text:
+        return EventKind.PRIZE
+    return EventKind.OTHER
+
+
+def run(number=20000):
+    for text in BOT_MESSAGES:
+        assert classify(text) is legacy_classify(text), text
+
+    print(f"{'message':<22}{'legacy us':>12}{'compiled us':>14}")
+    for text in sorted(set(BOT_MESSAGES), key=BOT_MESSAGES.index):
+        legacy = timeit.timeit(lambda: legacy_classify(text), number=number) / number * 1e6
+        compiled = timeit.timeit(lambda: classify(text), number=number) / number * 1e6
+        print(f"{classify(text).value:<22}{legacy:>12.2f}{compiled:>14.2f}")
+
+    legacy = timeit.timeit(lambda: [legacy_classify(t) for t in BOT_MESSAGES], number=number // 10)
+    compiled = timeit.timeit(lambda: [classify(t) for t in BOT_MESSAGES], number=number // 10)
+    print(f"corpus total: legacy {legacy:.3f}s, compiled {compiled:.3f}s ({legacy / compiled:.1f}x)")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,134 @@
+"""Self-command routing for an account sitting in many busy groups
+
+Feeds MESSAGES group messages through the simulated client, once with the
+six per-command `events.NewMessage(pattern=...)` handlers the bot used to
+register and once with the outgoing-only CommandRouter. Most of the traffic
+is other people's chatter and commands for other bots; a small share is the
+account's own messages. The command handlers are replaced by counters, so
+only routing is measured, along with how often a command handler ran for a
+message the account did not send or that was not meant for it.
+"""
+import asyncio
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telethon import events
+from telethon.tl import types
+from command_router import parse_command
+from corpus import CHATTER
+from main import BlisseyBot
+from simulator import BOT_ID, SELF_ID, SimMessage, SimulatedClient, run_virtual
+
+GROUPS = 300
+MESSAGES = 100000
+COMMANDS = ('custom', 'run', 'pause', 'guide', 'set_attack', 'stats')
+# commands people in big groups send to their other bots
+OTHER_BOT_COMMANDS = ("/start", "/help", "/stats@GroupStatsBot", "/run@QuizBot", "/runaway", "/pause@MusicBot",
+                      "/settings", "/set_attack_mode 2", "/customize", "/guidelines", "/top", "/rank")
+# what the account itself writes now and then
+OWN_MESSAGES = ("ok", "gg", "/stats", "/guide", "/challenge@HeXamonbot", "lol nice")
+
+
+def traffic(count, seed=1):
+    """(chat ID, text, outgoing) for `count` messages spread over GROUPS groups"""
+    rng = random.Random(seed)
+    chatter = CHATTER + ("anyone up for a trade?", "brb", "what level is your lucario", "🔥🔥🔥", "/")
+    messages = []
+    for _ in range(count):
+        chat_id = -1001000000000 - rng.randrange(GROUPS)
+        roll = rng.random()
+        if roll < 0.80:
+            messages.append((chat_id, rng.choice(chatter), False))
+        elif roll < 0.95:
+            messages.append((chat_id, rng.choice(OTHER_BOT_COMMANDS), False))
+        elif roll < 0.99:
+            # someone else typing one of our command names, for their own reasons
+            messages.append((chat_id, "/" + rng.choice(COMMANDS), False))
+        else:
+            messages.append((chat_id, rng.choice(OWN_MESSAGES), True))
+    return messages
+
+
+def counting(runs, wrong, name):
+    async def handler(event, args=""):
+        runs[name] += 1
+        if not event.out or parse_command(event.raw_text) is None:
+            wrong[name] += 1
+    return handler
+
+
+async def route(mode, messages):
+    client = SimulatedClient()
+    await client.connect()
+    bot = BlisseyBot(0, "", name=f"commands-{mode}", client=client)
+    bot.target.peers.channel = client.channel
+    bot.target.peers.bot_id = BOT_ID
+    runs, wrong = Counter(), Counter()
+    handlers = {name: counting(runs, wrong, name) for name in COMMANDS}
+    bot.commands.commands = dict(handlers)
+    bot.setup_handlers()
+    if mode == "pattern handlers":
+        # what setup_handlers registered before the router
+        client.handlers = [(builder, callback) for builder, callback in client.handlers
+                           if not (isinstance(builder, events.NewMessage) and builder.outgoing)]
+        for name in COMMANDS:
+            handler = handlers[name]
+            client.add_event_handler(lambda event, handler=handler: handler(event, event.raw_text.partition(' ')[2]),
+                                     events.NewMessage(pattern=f'/{name}'))
+    person = types.User(id=SELF_ID + 1, access_hash=4, first_name="Trainer")
+    sims = [SimMessage(10 + i, text, client.me if out else person, chat_id=chat_id, out=out)
+            for i, (chat_id, text, out) in enumerate(messages)]
+    started = time.perf_counter()
+    for message in sims:
+        client.deliver(message, False)
+    await asyncio.gather(*client.tasks)
+    return time.perf_counter() - started, runs, wrong
+
+
+def match_only(messages, number=3):
+    """Just the per-message routing work, without the simulated Telethon around it"""
+    patterns = [re.compile(f'/{name}').match for name in COMMANDS]
+    table = dict.fromkeys(COMMANDS)
+    old = new = 0.0
+    for _ in range(number):
+        started = time.perf_counter()
+        for _, text, out in messages:
+            for pattern in patterns:
+                pattern(text)
+        old += time.perf_counter() - started
+        started = time.perf_counter()
+        for _, text, out in messages:
+            if out:
+                parsed = parse_command(text)
+                if parsed is not None:
+                    table.get(parsed[0])
+        new += time.perf_counter() - started
+    return old / number, new / number
+
+
+def run(count=MESSAGES):
+    logging.disable(logging.CRITICAL)
+    os.chdir(tempfile.mkdtemp(prefix="blissey-bench-"))
+    messages = traffic(count)
+    own = sum(1 for _, _, out in messages if out)
+    print(f"{count} messages in {GROUPS} groups, {own} of them the account's own")
+    print(f"{'routing':<20}{'us/msg':>8}{'handler runs':>14}{'wrong':>7}  wrong runs by command")
+    for mode in ("pattern handlers", "router"):
+        elapsed, runs, wrong = run_virtual(route(mode, messages))
+        by_command = ", ".join(f"{name} {n}" for name, n in sorted(wrong.items())) or "none"
+        print(f"{mode:<20}{elapsed / count * 1e6:>8.2f}{sum(runs.values()):>14}{sum(wrong.values()):>7}  {by_command}")
+    old, new = match_only(messages)
+    print(f"matching alone: six regexes {old / count * 1e6:.3f} us/msg, "
+          f"outgoing check + one parse {new / count * 1e6:.3f} us/msg")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else MESSAGES)
@@ -0,0 +1,50 @@
+"""Outbound traffic over simulated days with a daily battle limit: retry every few seconds vs park until reset"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import BlisseyBot
+from simulator import LatencyProfile, SimulatedClient, run_virtual
+
+DAYS = 2
+PROFILE = LatencyProfile("limited", latency=0.25, jitter=0.1, daily_limit_after=300, flood_rate=0.002)
+
+
+async def simulate(park, days=DAYS):
+    client = SimulatedClient(PROFILE, seed=1)
+    bot = BlisseyBot(0, "", name=f"daily-{park}", client=client)
+    loop = asyncio.get_running_loop()
+    bot.daily.clock = bot.history.clock = loop.time
+    if not park:
+        # what process_message did before: challenge again after 3 seconds
+        bot.park_until_reset = lambda delay, target=None: bot.target.battle.schedule(3, bot.send_challenge_command, "challenge")
+        bot.daily.remaining = lambda: 0.0
+    runner = asyncio.create_task(bot.start())
+    while not bot.is_running:
+        await asyncio.sleep(0.1)
+    bot.automation_running = True
+    await bot.send_challenge_command()
+    await asyncio.sleep(days * 24 * 3600)
+    bot.request_stop()
+    await runner
+    return client
+
+
+def run(days=DAYS):
+    logging.disable(logging.CRITICAL)
+    os.chdir(tempfile.mkdtemp(prefix="blissey-bench-"))
+    print(f"{'mode':<14}{'battles':>9}{'prizes':>8}{'challenges':>12}{'limit replies':>15}"
+          f"{'flood waits':>13}{'rpc calls':>11}")
+    for park in (False, True):
+        client = run_virtual(simulate(park, days))
+        stats = client.hexamonbot.stats
+        print(f"{'park' if park else 'retry 3s':<14}{stats['battles']:>9}{stats['prizes']:>8}{stats['challenges']:>12}"
+              f"{stats['daily_limit']:>15}{stats.get('flood_waits', 0):>13}{client.rpc_calls:>11}")
+
+
+if __name__ == "__main__":
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else DAYS)
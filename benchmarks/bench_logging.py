@@ -0,0 +1,63 @@
+"""Click latency with verbose logging on and off, synchronous handlers vs the queued pipeline"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logging_setup import setup_logging, stop_logging
+from main import BlisseyBot
+from simulator import LatencyProfile, SimulatedClient, SimMessage, battle_keyboard
+
+
+def use_sync_logging(level, path):
+    # what main.py did before: handlers run on the event loop thread
+    stop_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+async def measure(clicks):
+    client = SimulatedClient(LatencyProfile("bench", latency=0, jitter=0, min_click_interval=0))
+    bot = BlisseyBot(0, "", name="bench", client=client)
+    await client.connect()
+    for bucket in bot.limiter.buckets.values():
+        bucket.rate = bucket.capacity = 1e9
+    message = SimMessage(1000, "Battle begins!", client.hexamonbot.user, reply_markup=battle_keyboard())
+    samples = []
+    for _ in range(clicks):
+        started = time.perf_counter()
+        await bot.click_battle_button(bot.target, message)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return sum(samples) / len(samples), samples[len(samples) // 2], samples[int(len(samples) * 0.99)]
+
+
+def run(clicks=3000):
+    os.chdir(tempfile.mkdtemp(prefix="blissey-bench-"))
+    # the console is not what we measure, send it to /dev/null
+    sys.stderr = open(os.devnull, 'w')
+    setups = (
+        ("sync handlers, verbose", lambda: use_sync_logging(logging.DEBUG, "sync.log")),
+        ("sync handlers, info", lambda: use_sync_logging(logging.INFO, "sync.log")),
+        ("queued + sampled, verbose", lambda: setup_logging("DEBUG", "queued.log")),
+        ("queued + sampled, info", lambda: setup_logging("INFO", "queued.log")),
+    )
+    print(f"{'setup':<28}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}", file=sys.stdout)
+    for label, configure in setups:
+        configure()
+        mean, p50, p99 = asyncio.run(measure(clicks))
+        print(f"{label:<28}{mean * 1e6:>10.0f}{p50 * 1e6:>10.0f}{p99 * 1e6:>10.0f}", file=sys.stdout)
+    stop_logging()
+
+
+if __name__ == "__main__":
+    run()
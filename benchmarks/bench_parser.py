@@ -0,0 +1,93 @@
+"""Parsing HeXamonbot messages once into a BattleMessage vs extracting fields per consumer
+
+First runs the parser over the fuzz corpus and checks that it never raises
+and that every record is consistent with classify(). Then times the recorded
+corpus: classify alone (what the bot did before), one parse_message per
+update, and classify plus separate extraction by the click logic, the
+stats and the history, as consumers without a shared record would have to.
+"""
+import os
+import re
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from battle_message import BattleMessage, parse_message, penalty_amount, prize_amount
+from classifier import EventKind, classify
+from corpus import BOT_MESSAGES
+from fuzz_corpus import EDGE_CASES, fuzz_messages
+
+_HP = re.compile(r'HP (\d+)/(\d+)')
+_USED = re.compile(r'^(.+?) used ([^!\n]+)!', re.MULTILINE)
+
+
+def check(text):
+    parsed = parse_message(text)
+    assert parsed.kind is classify(text), "kind differs from classify()"
+    for field in ('opponent_hp', 'opponent_max_hp', 'own_hp', 'own_max_hp'):
+        value = getattr(parsed, field)
+        assert value is None or isinstance(value, int) and value >= 0, f"{field} = {value!r}"
+    assert isinstance(parsed.prize, int) and parsed.prize >= 0, f"prize = {parsed.prize!r}"
+    assert isinstance(parsed.penalty, int) and parsed.penalty >= 0, f"penalty = {parsed.penalty!r}"
+    for move in (parsed.opponent_move, parsed.own_move):
+        assert move is None or "\n" not in move and "!" not in move, f"move = {move!r}"
+    parsed.describe()
+
+
+def fuzz(count):
+    messages = list(EDGE_CASES) + fuzz_messages(count)
+    started = time.perf_counter()
+    slowest = 0.0
+    for index, text in enumerate(messages):
+        began = time.perf_counter()
+        try:
+            check(text)
+        except Exception as e:
+            raise AssertionError(f"fuzz message {index} {text[:200]!r}: {e}") from e
+        slowest = max(slowest, time.perf_counter() - began)
+    elapsed = time.perf_counter() - started
+    print(f"fuzz: {len(messages)} messages ok in {elapsed:.2f}s, slowest {slowest * 1e6:.0f} us")
+
+
+def per_consumer(text):
+    # each consumer pulls out what it needs on its own
+    kind = classify(text)
+    if kind in (EventKind.BATTLE_START, EventKind.BLISSEY_SWITCH, EventKind.BLISSEY_MOVE):
+        _HP.findall(text)
+        _USED.findall(text)
+    kind = classify(text)
+    _HP.findall(text)
+    if classify(text) is EventKind.PRIZE:
+        prize_amount(text)
+    elif kind is EventKind.FORFEIT:
+        penalty_amount(text)
+
+
+class DictRecord:
+    # the same fields on a plain object, for the size comparison
+    def __init__(self, parsed):
+        for field in BattleMessage.__slots__:
+            setattr(self, field, getattr(parsed, field))
+
+
+def run(number=20000, fuzz_count=20000):
+    fuzz(fuzz_count)
+    print(f"{'setup':<34}{'us/update':>10}")
+    for label, fn in (
+        ("classify only (before)", classify),
+        ("parse_message once", parse_message),
+        ("classify + per-consumer regexes", per_consumer),
+    ):
+        seconds = timeit.timeit(lambda: [fn(t) for t in BOT_MESSAGES], number=number // 10)
+        print(f"{label:<34}{seconds / (number // 10) / len(BOT_MESSAGES) * 1e6:>10.2f}")
+
+    parsed = parse_message(BOT_MESSAGES[2])
+    plain = DictRecord(parsed)
+    print(f"record size: __slots__ {sys.getsizeof(parsed)} bytes, "
+          f"plain object {sys.getsizeof(plain) + sys.getsizeof(plain.__dict__)} bytes")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,94 @@
+"""Turns per battle and battles per hour with the configured move vs the move policy
+
+The simulated Blissey here takes damage from the pressed move (DAMAGE), so the
+move matters: each configured attack position is run once pressing it every
+turn and once with the "rules" policy, both starting with no damage learned.
+The turns recorded by the rules runs are then used to evaluate the policies
+offline with move_policy.evaluate_policy, next to what the simulator measured.
+
+    python benchmarks/bench_policy.py [hours] [history.sqlite3]
+
+With a history file, the offline part runs against that account's recorded turns.
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from battle_history import BattleHistory
+from main import BlisseyBot
+from move_policy import evaluate_policy, make_policy
+from simulator import MOVES, LatencyProfile, SimulatedClient, run_virtual
+
+HOURS = 1.0
+# rough hits of a level 100 Lucario on a wild Blissey (714 HP)
+DAMAGE = {
+    "Close Combat": (330, 390, 1.0),
+    "Extreme Speed": (100, 120, 1.0),
+    "Double-Edge": (170, 200, 1.0),
+    "Swords Dance": (0, 0, 1.0),
+}
+PROFILE = LatencyProfile("normal", latency=0.25, jitter=0.1, too_many_rate=0.05, busy_rate=0.02, damage=DAMAGE)
+# (row, column) of the damaging moves on the simulated keyboard; [1][0] is the config.py default
+POSITIONS = ((0, 0), (0, 1), (1, 0))
+
+
+async def simulate(policy, row, col, hours=HOURS, seed=1):
+    client = SimulatedClient(PROFILE, seed=seed)
+    bot = BlisseyBot(0, "", name=f"{policy}-{row}{col}", client=client, attack_row=row, attack_col=col)
+    bot.policy = make_policy(policy, bot.move_damage)
+    runner = asyncio.create_task(bot.start())
+    while not bot.is_running:
+        await asyncio.sleep(0.1)
+    bot.automation_running = True
+    await bot.send_challenge_command()
+    await asyncio.sleep(hours * 3600)
+    bot.request_stop()
+    await runner
+    return client, bot
+
+
+def offline(recorded, measured):
+    print(f"\noffline evaluation: 2000 battles each, hits drawn from {len(recorded)} recorded turns")
+    print(f"{'policy':<12}{'attack':<16}{'avg turns':>10}{'p90':>5}{'unknown':>9}{'simulated':>11}")
+    for row, col in POSITIONS:
+        configured = MOVES[row * 2 + col]
+        for policy in ("configured", "rules"):
+            result = evaluate_policy(make_policy(policy), recorded, MOVES, configured, battles=2000)
+            simulated = measured.get((policy, configured))
+            print(f"{policy:<12}{configured:<16}{result['avg_turns']:>10.2f}{result['p90_turns']:>5}"
+                  f"{result['unknown']:>9}{'-' if simulated is None else f'{simulated:.2f}':>11}")
+
+
+def run(hours=HOURS, history_path=None):
+    logging.disable(logging.CRITICAL)
+    os.chdir(tempfile.mkdtemp(prefix="blissey-bench-"))
+    print(f"{'policy':<12}{'attack':<16}{'battles/h':>10}{'prizes/h':>10}{'turns/battle':>14}{'forfeits':>10}"
+          f"{'wall s':>8}  learned")
+    measured = {}
+    recorded = []
+    for row, col in POSITIONS:
+        configured = MOVES[row * 2 + col]
+        for policy in ("configured", "rules"):
+            started = time.perf_counter()
+            client, bot = run_virtual(simulate(policy, row, col, hours))
+            wall = time.perf_counter() - started
+            stats = client.hexamonbot.stats
+            history = bot.history.summary()
+            measured[policy, configured] = history['avg_turns']
+            if policy == "rules":
+                recorded.extend(bot.history.recorded_turns())
+            print(f"{policy:<12}{configured:<16}{stats['battles'] / hours:>10.1f}{stats['prizes'] / hours:>10.1f}"
+                  f"{history['avg_turns']:>14.2f}{stats['forfeits']:>10}{wall:>8.2f}  {bot.move_damage.describe()}")
+    if history_path:
+        recorded = BattleHistory(history_path).recorded_turns()
+        measured = {}
+    offline(recorded, measured)
+
+
+if __name__ == "__main__":
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else HOURS, sys.argv[2] if len(sys.argv) > 2 else None)
@@ -0,0 +1,120 @@
+"""Battles per hour and time to recover when the connection keeps dropping
+
+The simulated network drops every DROP_EVERY seconds on average and stays
+down for OUTAGE seconds; HeXamonbot updates sent meanwhile are lost. The bot
+runs on a stable network for reference, then without any supervisor, with reconnects only, and with reconnects plus
+the catch-up replay. "reconn" is the time from the drop to a working
+connection, "back" the time from the drop to the bot's first click
+or challenge after it.
+"""
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import BlisseyBot
+from simulator import LatencyProfile, SimulatedClient, run_virtual
+
+HOURS = 1.0
+DROP_EVERY = 300
+OUTAGE = (5, 60)
+MODES = ("no drops", "none", "reconnect only", "reconnect + catch-up")
+
+
+class TimedClient(SimulatedClient):
+    """Notes when each dropped connection comes back and the first click or challenge after it"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lost_at = None
+        self.dropped_at = None
+        self.reconnected = []
+        self.back = []
+
+    async def connect(self):
+        await super().connect()
+        if self.dropped_at is not None:
+            self.reconnected.append(asyncio.get_running_loop().time() - self.dropped_at)
+            self.dropped_at = None
+
+    def note_outbound(self):
+        if self.connected and self.lost_at is not None:
+            self.back.append(asyncio.get_running_loop().time() - self.lost_at)
+            self.lost_at = None
+
+    def lose_connection(self):
+        if self.connected:
+            self.dropped_at = asyncio.get_running_loop().time()
+            if self.lost_at is None:
+                self.lost_at = self.dropped_at
+        super().lose_connection()
+
+    async def send_message(self, *args, **kwargs):
+        self.note_outbound()
+        return await super().send_message(*args, **kwargs)
+
+    async def __call__(self, request):
+        self.note_outbound()
+        return await super().__call__(request)
+
+
+def percentile(values, pct):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def simulate(mode, hours=HOURS, seed=1):
+    loop = asyncio.get_running_loop()
+    drop_every = None if mode == "no drops" else DROP_EVERY
+    profile = LatencyProfile("flaky", latency=0.25, jitter=0.1, disconnect_every=drop_every, outage=OUTAGE)
+    client = TimedClient(profile, seed=seed)
+    bot = BlisseyBot(0, "", name="flaky", client=client)
+    bot.metrics.clock = loop.time
+    bot.connection.policy.rng = random.Random(seed)
+    bot.retry.policy.rng = random.Random(seed)
+
+    async def no_catch_up(lost_at):
+        pass
+
+    if mode == "reconnect only":
+        bot.connection.on_restored = no_catch_up
+    if mode == "none":
+        bot.connection.watch = lambda: asyncio.sleep(hours * 3600)
+
+    runner = asyncio.create_task(bot.start())
+    while not bot.is_running:
+        await asyncio.sleep(0.1)
+    bot.automation_running = True
+    await bot.send_challenge_command()
+    await asyncio.sleep(hours * 3600)
+    bot.request_stop()
+    await runner
+    return client, bot
+
+
+def run(hours=HOURS):
+    logging.disable(logging.CRITICAL)
+    os.chdir(tempfile.mkdtemp(prefix="blissey-bench-"))
+    print(f"{'mode':<24}{'drops':>7}{'battles/h':>11}{'recovered':>11}{'reconn p50 s':>14}{'back p50 s':>12}{'back p90 s':>12}"
+          f"{'rpc/h':>8}{'wall s':>8}")
+    for mode in MODES:
+        started = time.perf_counter()
+        client, bot = run_virtual(simulate(mode, hours))
+        wall = time.perf_counter() - started
+        stats = client.hexamonbot.stats
+        back = client.back
+        print(f"{mode:<24}{client.drops:>7}{stats['battles'] / hours:>11.1f}{len(back):>11}{percentile(client.reconnected, 50):>14.1f}"
+              f"{percentile(back, 50):>12.1f}{percentile(back, 90):>12.1f}"
+              f"{client.rpc_calls / hours:>8.0f}{wall:>8.2f}")
+
+
+if __name__ == "__main__":
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else HOURS)
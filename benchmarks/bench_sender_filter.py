@@ -0,0 +1,78 @@
+"""Handler CPU time per 10k mixed channel messages: get_sender + username vs numeric sender ID"""
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classifier import classify
+from corpus import BOT_MESSAGES, CHATTER
+
+BOT_ID = 6121307474
+BOT_USERNAME = "HeXamonbot"
+
+
+class FakeUser:
+    def __init__(self, user_id, username):
+        self.id = user_id
+        self.username = username
+
+
+class FakeMessage:
+    def __init__(self, sender, text):
+        self._sender = sender
+        self.sender_id = sender.id
+        self.text = text
+
+    async def get_sender(self):
+        # best case for the old path: the sender is already cached, no RPC
+        await asyncio.sleep(0)
+        return self._sender
+
+
+def build_messages(count, bot_share):
+    rng = random.Random(7)
+    bot = FakeUser(BOT_ID, BOT_USERNAME)
+    humans = [FakeUser(1000 + i, f"user{i}") for i in range(50)]
+    messages = []
+    for _ in range(count):
+        if rng.random() < bot_share:
+            messages.append(FakeMessage(bot, rng.choice(BOT_MESSAGES)))
+        else:
+            messages.append(FakeMessage(rng.choice(humans), rng.choice(CHATTER)))
+    return messages
+
+
+async def old_handler(message):
+    sender = await message.get_sender()
+    if sender and hasattr(sender, 'username') and sender.username == BOT_USERNAME:
+        classify(message.text)
+
+
+async def new_handler(message, from_users=frozenset([BOT_ID])):
+    # what events.NewMessage(from_users=bot_id) does before dispatching
+    if message.sender_id not in from_users:
+        return
+    classify(message.text)
+
+
+async def measure(handler, messages):
+    start = time.process_time()
+    for message in messages:
+        await handler(message)
+    return time.process_time() - start
+
+
+async def run(count=10000):
+    for bot_share in (0.1, 0.3, 0.5):
+        messages = build_messages(count, bot_share)
+        old = min([await measure(old_handler, messages) for _ in range(5)])
+        new = min([await measure(new_handler, messages) for _ in range(5)])
+        print(f"bot share {bot_share:.0%}: get_sender {old * 1000:.1f} ms, "
+              f"sender id {new * 1000:.1f} ms per {count} messages ({old / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,67 @@
+"""Updates per second through the session layer: Telethon's SQLite session vs the in-memory snapshot session
+
+Every update stores its users and chats in the session, as Telethon does before
+dispatching it; every SAVE_EVERY updates the update state is stored and the
+session saved, like Telethon's once-a-minute keepalive.
+"""
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telethon.sessions import SQLiteSession
+from telethon.tl import types
+from session_store import SnapshotSession
+from simulator import BOT_ID, CHANNEL_ID
+
+UPDATES = 20000
+SAVE_EVERY = 1000
+CHATTERS = 500
+
+
+def make_updates(count, seed=1):
+    rng = random.Random(seed)
+    channel = types.Channel(id=CHANNEL_ID, title="JMD BLISSEY", photo=types.ChatPhotoEmpty(), date=None,
+                            access_hash=3, username="JMD_BLISSEY", megagroup=True)
+    bot = types.User(id=BOT_ID, access_hash=1, bot=True, username="HeXamonbot", first_name="HeXamon")
+    chatters = [types.User(id=1000 + i, access_hash=10 + i, username=f"player{i}", first_name=f"Player {i}")
+                for i in range(CHATTERS)]
+    updates = []
+    for _ in range(count):
+        # most channel traffic is HeXamonbot, the rest is players chatting
+        users = [bot] if rng.random() < 0.6 else [rng.choice(chatters)]
+        updates.append(types.contacts.ResolvedPeer(None, users, [channel]))
+    return updates
+
+
+def measure(session, updates):
+    state = types.updates.State(1, 0, datetime.datetime.now(tz=datetime.timezone.utc), 1, unread_count=0)
+    started = time.perf_counter()
+    for i, update in enumerate(updates, 1):
+        session.process_entities(update)
+        if i % SAVE_EVERY == 0:
+            session.set_update_state(0, state)
+            session.save()
+    session.close()
+    return len(updates) / (time.perf_counter() - started)
+
+
+def run(count=UPDATES):
+    os.chdir(tempfile.mkdtemp(prefix="blissey-bench-"))
+    updates = make_updates(count)
+    sessions = (
+        ("sqlite (.session file)", lambda: SQLiteSession("bench")),
+        ("memory + snapshots", lambda: SnapshotSession("sessions/bench.json")),
+    )
+    print(f"{'session':<26}{'updates/s':>12}")
+    for label, make in sessions:
+        rate = measure(make(), updates)
+        print(f"{label:<26}{rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    run()
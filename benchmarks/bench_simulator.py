@@ -0,0 +1,68 @@
+"""End-to-end reaction latency and battles per hour against the simulated HeXamonbot
+
+Runs the real BlisseyBot on a virtual clock, so each profile simulates
+HOURS of farming in a few seconds of wall time.
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import BlisseyBot
+from simulator import PROFILES, SimulatedClient, run_virtual
+
+HOURS = 1.0
+
+
+def percentile(values, pct):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def simulate(profile, hours=HOURS, seed=1, adaptive=True):
+    client = SimulatedClient(profile, seed=seed)
+    bot = BlisseyBot(0, "", name=profile.name, client=client)
+    bot.metrics.clock = asyncio.get_running_loop().time
+    if not adaptive:
+        # pin every delay to its config.py value, like before adaptive pacing
+        for controller in bot.pacing.controllers.values():
+            controller.floor = controller.ceiling = controller.delay
+    runner = asyncio.create_task(bot.start())
+    while not bot.is_running:
+        await asyncio.sleep(0.1)
+    bot.automation_running = True
+    await bot.send_challenge_command()
+    await asyncio.sleep(hours * 3600)
+    bot.request_stop()
+    await runner
+    return client, bot
+
+
+def run(hours=HOURS):
+    logging.disable(logging.CRITICAL)
+    # keep metrics and learned pacing from this run out of the working tree
+    os.chdir(tempfile.mkdtemp(prefix="blissey-bench-"))
+    print(f"{'profile':<20}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'battles/h':>11}{'prizes/h':>10}"
+          f"{'forfeits':>10}{'too many':>10}{'stale':>7}{'rpc/h':>8}{'wall s':>8}  learned delays")
+    for profile in PROFILES:
+        for adaptive in (False, True):
+            started = time.perf_counter()
+            client, bot = run_virtual(simulate(profile, hours, adaptive=adaptive))
+            wall = time.perf_counter() - started
+            label = f"{profile.name} ({'adaptive' if adaptive else 'fixed'})"
+            stats = client.hexamonbot.stats
+            latencies = [latency * 1000 for latency in client.reaction_latencies]
+            print(f"{label:<20}{percentile(latencies, 50):>9.0f}{percentile(latencies, 90):>9.0f}"
+                  f"{percentile(latencies, 99):>9.0f}{stats['battles'] / hours:>11.1f}"
+                  f"{stats['prizes'] / hours:>10.1f}{stats['forfeits']:>10}{stats['too_many']:>10}{stats['stale_clicks']:>7}"
+                  f"{client.rpc_calls / hours:>8.0f}{wall:>8.2f}  {bot.pacing.describe()}")
+
+if __name__ == "__main__":
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else HOURS)
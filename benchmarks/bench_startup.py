@@ -0,0 +1,67 @@
+"""Time from process launch to the first challenge sent, with a cold and a warm peer cache
+
+Each run is a fresh Python process against the simulator on a real clock, so
+imports, config loading and every startup round trip are included.
+"""
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 5
+
+
+async def first_challenge(launched):
+    from main import BlisseyBot
+    from simulator import LatencyProfile, SimulatedClient
+
+    client = SimulatedClient(LatencyProfile("startup", latency=0.25, jitter=0.05))
+    bot = BlisseyBot(0, "", name="startup", client=client, auto_run=True)
+    send_message = client.send_message
+
+    async def timed_send_message(*args, **kwargs):
+        if not bot.stopped.is_set():
+            print(f"{time.time() - launched:.3f} {client.rpc_calls}")
+            bot.request_stop()
+        return await send_message(*args, **kwargs)
+
+    client.send_message = timed_send_message
+    await bot.start()
+
+
+def child(launched):
+    sys.path.insert(0, ROOT)
+    logging.disable(logging.CRITICAL)
+    asyncio.run(first_challenge(launched))
+
+
+def launch(workdir):
+    launched = time.time()
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", repr(launched)],
+                            cwd=workdir, capture_output=True, text=True, check=True).stdout
+    seconds, rpcs = output.split()
+    return float(seconds), int(rpcs)
+
+
+def run(runs=RUNS):
+    print(f"{'cache':<8}{'mean s':>9}{'min s':>9}{'RPCs before challenge':>24}")
+    results = {'cold': [], 'warm': []}
+    for _ in range(runs):
+        workdir = tempfile.mkdtemp(prefix="blissey-bench-")
+        # the first start resolves and saves the peers, the second reuses them
+        results['cold'].append(launch(workdir))
+        results['warm'].append(launch(workdir))
+    for cache, samples in results.items():
+        times = [seconds for seconds, _ in samples]
+        print(f"{cache:<8}{sum(times) / len(times):>9.3f}{min(times):>9.3f}{samples[-1][1]:>24}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        child(float(sys.argv[2]))
+    else:
+        run()
@@ -0,0 +1,59 @@
+"""Battles per hour for one account farming one, two or three challenge posts
+
+Each post has its own simulated Blissey. "contested" posts are often being
+battled by other players, so a challenge gets "currently battling" and that
+post rests for CURRENTLY_BATTLING_COOLDOWN seconds.
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import *
+from main import BlisseyBot
+from simulator import LatencyProfile, SimulatedClient, run_virtual
+
+HOURS = 1.0
+POSTS = [(TARGET_CHANNEL, TARGET_MESSAGE_ID), (TARGET_CHANNEL, TARGET_MESSAGE_ID + 100), ("@BLISSEY_FARM", 42)]
+PROFILES = (
+    LatencyProfile("normal", latency=0.25, jitter=0.1, too_many_rate=0.05, busy_rate=0.02),
+    LatencyProfile("contested", latency=0.25, jitter=0.1, too_many_rate=0.05, busy_rate=0.3),
+)
+
+
+async def simulate(profile, targets, hours=HOURS, seed=1):
+    client = SimulatedClient(profile, seed=seed, targets=targets)
+    bot = BlisseyBot(0, "", name=f"{profile.name}-{len(targets)}", client=client, targets=targets)
+    runner = asyncio.create_task(bot.start())
+    while not bot.is_running:
+        await asyncio.sleep(0.1)
+    bot.automation_running = True
+    await bot.send_challenge_command()
+    await asyncio.sleep(hours * 3600)
+    bot.request_stop()
+    await runner
+    return client, bot
+
+
+def run(hours=HOURS):
+    logging.disable(logging.CRITICAL)
+    os.chdir(tempfile.mkdtemp(prefix="blissey-bench-"))
+    print(f"{'profile':<12}{'posts':>6}{'battles/h':>11}{'prizes/h':>10}{'busy':>7}{'challenges':>12}"
+          f"{'rpc/h':>8}{'wall s':>8}  battles per post")
+    for profile in PROFILES:
+        for count in range(1, len(POSTS) + 1):
+            started = time.perf_counter()
+            client, bot = run_virtual(simulate(profile, POSTS[:count], hours))
+            wall = time.perf_counter() - started
+            stats = client.hexamonbot.stats
+            per_post = ", ".join(str(target.battles) for target in bot.targets)
+            print(f"{profile.name:<12}{count:>6}{stats['battles'] / hours:>11.1f}{stats['prizes'] / hours:>10.1f}"
+                  f"{stats['busy']:>7}{stats['challenges']:>12}{client.rpc_calls / hours:>8.0f}{wall:>8.2f}  {per_post}")
+
+
+if __name__ == "__main__":
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else HOURS)
@@ -0,0 +1,67 @@
+"""HeXamonbot messages as they show up in @JMD_BLISSEY, used by the benchmarks"""
+
+BATTLE_START = (
+    "Battle begins!\n\n"
+    "Wild Blissey Lv. 100 [Normal]\nHP 714/714\n\n"
+    "Current turn: Lucario Lv. 100 [Fighting/Steel]\nHP 344/344"
+)
+
+BLISSEY_SWITCH = (
+    "Blissey switched out, Blissey is now on the battle field.\n\n"
+    "Blissey Lv. 100 [Normal]\nHP 714/714\n\n"
+    "Current turn: Lucario Lv. 100 [Fighting/Steel]\nHP 344/344"
+)
+
+BLISSEY_MOVE = (
+    "Lucario used Close Combat!\nIt's super effective!\n"
+    "Blissey used Double-Edge!\n\n"
+    "Blissey Lv. 100 [Normal]\nHP 212/714\n\n"
+    "Current turn: Lucario Lv. 100 [Fighting/Steel]\nHP 281/344"
+)
+
+FORFEIT = "Lucario has not moved. Player forfeits and loses 15 💵"
+
+FORFEIT_VARIANT = "Lucario has not moved for 60 seconds. Player forfeits and loses 15 💵."
+
+CURRENTLY_BATTLING = "You are currently battling someone else. Finish that battle first."
+
+DAILY_LIMIT = (
+    "Daily limit for battling has been reached. You can still battle "
+    "but no prize will be given."
+)
+
+PRIZE = (
+    "Lucario used Close Combat!\nIt's super effective!\n"
+    "Blissey fainted!\n\nYou defeated Blissey.\nPrize: 1,250 💵"
+)
+
+TURN_UPDATE = (
+    "Lucario used Swords Dance!\nLucario's Attack rose sharply!\n\n"
+    "Blissey Lv. 100 [Normal]\nHP 714/714\n\n"
+    "Current turn: Lucario Lv. 100 [Fighting/Steel]\nHP 344/344"
+)
+
+CHATTER = (
+    "gm everyone",
+    "anyone know when the event ends?",
+    "/challenge@HeXamonbot",
+    "blissey again lol",
+    "Bro the battle lag is crazy today",
+    "How many prize money did you get?",
+)
+
+BOT_MESSAGES = (
+    BATTLE_START,
+    BLISSEY_SWITCH,
+    BLISSEY_MOVE,
+    TURN_UPDATE,
+    BLISSEY_MOVE,
+    TURN_UPDATE,
+    PRIZE,
+    BATTLE_START,
+    BLISSEY_MOVE,
+    FORFEIT,
+    FORFEIT_VARIANT,
+    CURRENTLY_BATTLING,
+    DAILY_LIMIT,
+)
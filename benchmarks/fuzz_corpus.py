@@ -0,0 +1,86 @@
+"""Malformed and mutated HeXamonbot messages for shaking out the battle message parser
+
+EDGE_CASES are hand-written; fuzz_messages() mutates the recorded corpus
+(truncation, spliced lines, odd numbers and unicode) from a fixed seed, so a
+failure can be reproduced by its index.
+"""
+import random
+import re
+
+from corpus import BOT_MESSAGES, CHATTER
+
+EDGE_CASES = (
+    "",
+    "\n",
+    "HP",
+    "HP /",
+    "HP 1/",
+    "Lv. 100\nHP 1/1",
+    " Lv. \nHP 5/5",
+    "Wild  Lv. 100 [Normal]\nHP 714/714",
+    "Current turn:  Lv. 100\nHP 0/0",
+    "Blissey Lv. 100 [Normal]\nHP 99999999999999999999/714",
+    "Blissey Lv. 100 [Normal]\nHP " + "9" * 5000 + "/714",
+    "Prize: " + "1," * 3000 + " 💵",
+    "Blissey Lv. 100 [Normal]\n\n\n\nHP 714/714",
+    "Blissey used !",
+    "Blissey used Double-Edge",
+    "used Double-Edge!",
+    "Blissey used Double-Edge!Blissey used Double-Edge!",
+    "Blissey fainted!",
+    " fainted!",
+    "Prize:",
+    "Prize: 💵",
+    "Prize: ,,,, 💵",
+    "Prize: 1,2,5,0 💵",
+    "Player forfeits and loses  💵",
+    "has not moved. Player forfeits and loses 15 💵 loses 30",
+    "Battle begins!" * 50,
+    "Lv. 1 " * 2000 + "\nHP 1/1",
+    "Blissey used " + "x" * 5000 + "!",
+    "\x00Battle begins!\x00\nHP 1/2",
+    "Battle begins!\n\nWild Blissey Lv. 100 [Normal]\nHP ７１４/７１４",
+    "Battle begins!\r\n\r\nWild Blissey Lv. 100 [Normal]\r\nHP 714/714",
+)
+
+_NUMBER = re.compile(r'\d+')
+_INSERTS = ("\n", "HP ", "/", "!", " used ", " Lv. ", "Wild ", "Current turn: ", "Prize: ", "💵", "٣", "​",
+            "-1", "999999999999", ",")
+
+
+def _mutate(text, rng):
+    choice = rng.randrange(6)
+    if choice == 0 and text:
+        # truncated mid-message, as a failed edit might leave it
+        return text[:rng.randrange(len(text))]
+    if choice == 1:
+        position = rng.randrange(len(text) + 1)
+        return text[:position] + rng.choice(_INSERTS) + text[position:]
+    if choice == 2 and text:
+        start = rng.randrange(len(text))
+        return text[:start] + text[start + rng.randrange(1, 8):]
+    if choice == 3:
+        lines = text.split("\n")
+        rng.shuffle(lines)
+        return "\n".join(lines)
+    if choice == 4:
+        return text + "\n" + rng.choice(BOT_MESSAGES)
+    numbers = list(_NUMBER.finditer(text))
+    if not numbers:
+        return text
+    # one number swapped for a random one, from 0 up to 24 digits
+    match = rng.choice(numbers)
+    return text[:match.start()] + str(rng.randrange(10 ** rng.randrange(1, 25))) + text[match.end():]
+
+
+def fuzz_messages(count=20000, seed=1):
+    """`count` mutated messages, each mutated one to four times"""
+    rng = random.Random(seed)
+    sources = BOT_MESSAGES + CHATTER + EDGE_CASES
+    messages = []
+    for _ in range(count):
+        text = rng.choice(sources)
+        for _ in range(rng.randint(1, 4)):
+            text = _mutate(text, rng)
+        messages.append(text)
+    return messages
@@ -0,0 +1,75 @@
+import enum
+from config import (
+    BATTLE_START_PATTERN,
+    BLISSEY_SWITCH_PATTERN,
+    BLISSEY_DOUBLE_EDGE_PATTERN,
+    FORFEIT_PATTERN,
+    CURRENTLY_BATTLING_PATTERN,
+    PRIZE_PATTERN,
+    PRIZE_CURRENCY,
+    DAILY_LIMIT_PATTERN,
+    DAILY_LIMIT_NO_PRIZE_PATTERN,
+)
+
+
+class EventKind(enum.Enum):
+    """What a HeXamonbot message means for the battle loop"""
+    BATTLE_START = "battle_start"
+    BLISSEY_SWITCH = "blissey_switch"
+    BLISSEY_MOVE = "blissey_move"
+    FORFEIT = "forfeit"
+    CURRENTLY_BATTLING = "currently_battling"
+    DAILY_LIMIT = "daily_limit"
+    PRIZE = "prize"
+    OTHER = "other"
+
+
+# kinds that make the bot click an attack button
+CLICK_KINDS = frozenset((EventKind.BATTLE_START, EventKind.BLISSEY_SWITCH, EventKind.BLISSEY_MOVE))
+
+
+# Rules in the same priority order as the old if/elif chain in process_message.
+# Each rule is a list of alternatives; an alternative matches when all of its
+# (literal, case sensitive) needles are present.
+_RULES = (
+    (EventKind.BATTLE_START, (((BATTLE_START_PATTERN, False),),)),
+    (EventKind.BLISSEY_SWITCH, (((BLISSEY_SWITCH_PATTERN, False),),)),
+    (EventKind.BLISSEY_MOVE, (((BLISSEY_DOUBLE_EDGE_PATTERN, False),),)),
+    (EventKind.FORFEIT, (
+        ((FORFEIT_PATTERN, False),),
+        (("has not moved", False), ("forfeits", False), ("loses 15", False)),
+    )),
+    (EventKind.CURRENTLY_BATTLING, (((CURRENTLY_BATTLING_PATTERN, False),),)),
+    (EventKind.DAILY_LIMIT, (((DAILY_LIMIT_PATTERN, True), (DAILY_LIMIT_NO_PRIZE_PATTERN, True)),)),
+    (EventKind.PRIZE, (((PRIZE_PATTERN, False), (PRIZE_CURRENCY, True)),)),
+)
+
+
+def _compile_rules():
+    # lowercase every case-insensitive needle once, up front
+    compiled = []
+    for kind, alternatives in _RULES:
+        compiled.append((kind, tuple(
+            tuple((literal if case_sensitive else literal.lower(), case_sensitive)
+                  for literal, case_sensitive in needles)
+            for needles in alternatives
+        )))
+    return tuple(compiled)
+
+
+_MATCHER = _compile_rules()
+
+
+def classify(text):
+    """Classify a bot message, lowercasing its text only once"""
+    if not text:
+        return EventKind.OTHER
+    lowered = text.lower()
+    for kind, alternatives in _MATCHER:
+        for needles in alternatives:
+            for needle, case_sensitive in needles:
+                if needle not in (text if case_sensitive else lowered):
+                    break
+            else:
+                return kind
+    return EventKind.OTHER
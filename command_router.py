@@ -0,0 +1,51 @@
+import logging
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+def parse_command(text):
+    """("set_attack", "3") for "/set_attack 3", None unless the text starts with a bare /command
+
+    "/run@SomeBot" is meant for another bot and "/running" is not "/run", so
+    neither is a command here.
+    """
+    if not text or text[0] != '/':
+        return None
+    parts = text[1:].split(None, 1)
+    if not parts or '@' in parts[0]:
+        return None
+    return parts[0], parts[1].strip() if len(parts) > 1 else ""
+
+
+class CommandRouter:
+    """Self-commands by name, for one handler on the account's outgoing messages
+
+    Each message is parsed once and the command looked up in a dict, so adding
+    a command adds no work for messages that are not commands.
+    """
+
+    def __init__(self):
+        self.commands = {}
+        self.counts = Counter()
+
+    def add(self, name, handler):
+        """Run `handler(event, args)` for "/name args" """
+        self.commands[name] = handler
+
+    async def dispatch(self, event):
+        """Run the command in `event`, if it is one; True when a handler ran"""
+        parsed = parse_command(event.raw_text)
+        if parsed is None:
+            return False
+        name, args = parsed
+        handler = self.commands.get(name)
+        if handler is None:
+            self.counts['unknown'] += 1
+            return False
+        self.counts[name] += 1
+        await handler(event, args)
+        return True
+
+    def stats(self):
+        return dict(self.counts)
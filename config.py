@@ -4,15 +4,44 @@ API_HASH = "5a2684512006853f2e48aca9652d83ea"
 
 # session strin
 SESSION_STRING = "YOUR_SESSION_STRING_HERE"
+# "sqlite" uses Telethon's .session file; "memory" keeps the session in memory
+# and snapshots it to SESSION_SNAPSHOT_FILE (the first run imports the .session file)
+SESSION_BACKEND = "sqlite"
+SESSION_SNAPSHOT_FILE = "sessions/{name}.json"
+
+# multi-account mode (used when this file exists, see accounts.example.json)
+ACCOUNTS_FILE = "accounts.json"
+STATUS_INTERVAL = 60
+# worker processes for large fleets, 0 = one per ACCOUNTS_PER_WORKER accounts
+# up to one per CPU core, 1 = single process
+WORKER_PROCESSES = 0
+ACCOUNTS_PER_WORKER = 50
+WORKER_RESTART_DELAY = 5
 
 # bot config
 TARGET_CHANNEL = "@JMD_BLISSEY"
 BOT_USERNAME = "HeXamonbot"
 TARGET_MESSAGE_ID = 530
+# challenge posts farmed by each account as (channel, message ID); while one
+# post cools down or is busy, the account challenges the next ready one
+TARGETS = [(TARGET_CHANNEL, TARGET_MESSAGE_ID)]
 
 # button config
 BATTLE_BUTTON_ROW = 1
 BATTLE_BUTTON_COL = 0
+# how the move is picked each turn: "configured" always presses the /set_attack
+# move or the button above, "rules" picks from the parsed battle state, using
+# the damage each move did in earlier turns (see move_policy.py)
+MOVE_POLICY = "rules"
+# buttons the rules never press: moves that do no damage, and battle actions
+POLICY_IGNORED_BUTTONS = ["Swords Dance", "Nasty Plot", "Calm Mind", "Bulk Up", "Agility", "Work Up",
+                          "Protect", "Detect", "Substitute", "Rest", "Recover", "Roost",
+                          "Run", "Flee", "Forfeit", "Switch", "Bag", "Pokemon"]
+# damage samples kept per move, and times a move is tried before the rules trust its average
+MOVE_DAMAGE_SAMPLES = 50
+MOVE_TRIES = 2
+# a wild Blissey's full HP, where offline policy evaluation starts each battle
+BLISSEY_MAX_HP = 714
 
 # automation settings
 RESTART_DELAY = 2
@@ -20,7 +49,81 @@ BUTTON_RETRY_DELAY = 3
 BUTTON_TIMEOUT = 10
 BATTLE_TIMEOUT = 10
 SMOOTH_DELAY = 1
+
+# adaptive pacing: the delays above are starting points, learned per account
+# and kept between these floors and ceilings ({name} is the account name)
+PACING_FILE = "pacing/{name}.json"
+PACING_STEP = 0.1
+PACING_BACKOFF = 1.25
+# successes in a row before a delay comes down by PACING_STEP; flood waits
+# multiply all delays by PACING_BACKOFF
+PACING_STREAK = 20
+SMOOTH_DELAY_FLOOR = 0.2
+SMOOTH_DELAY_CEILING = 5
+RESTART_DELAY_FLOOR = 1.5
+RESTART_DELAY_CEILING = 15
+BUTTON_RETRY_DELAY_FLOOR = 0.5
+BUTTON_RETRY_DELAY_CEILING = 15
+RETRY_BACKOFF_FACTOR = 2
+RETRY_MAX_DELAY = 30
+RETRY_JITTER = 0.5
+BATTLE_RETRY_DEADLINE = 300
+# reconnecting after a dropped connection backs off from the base delay up to the max
+RECONNECT_BASE_DELAY = 1
+RECONNECT_MAX_DELAY = 15
+CURRENTLY_BATTLING_COOLDOWN = 120
+# after a daily-limit reply the account sends nothing until the reset
+# (state kept in DAILY_LIMIT_FILE); a limit hit within the probe window after
+# waking moves the learned reset later by the probe step
+DAILY_LIMIT_FILE = "daily/{name}.json"
+DAILY_RESET_HOUR_UTC = 0
+DAILY_RESET_PROBE_WINDOW = 300
+DAILY_RESET_PROBE_STEP = 900
 LOG_LEVEL = "INFO"
+LOG_FILE = "blissey_bot.log"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+LOG_JSON = True
+# at most LOG_SAMPLE_BURST debug lines per call site every LOG_SAMPLE_INTERVAL seconds
+LOG_SAMPLE_BURST = 20
+LOG_SAMPLE_INTERVAL = 10
+
+# outbound rate limits per method type: (calls per second, burst)
+RATE_LIMITS = {
+    'challenge': (0.5, 2),
+    'click': (2, 3),
+    'edit': (1, 3),
+}
+
+# start automation on startup without waiting for /run
+AUTO_RUN = False
+# resolved channel and bot peers, reused on the next start ({name} is the account name)
+PEER_CACHE_FILE = "peers/{name}.json"
+
+# attack choices by user ID, shared by all accounts; writes are batched for this many seconds
+ATTACK_CONFIG_FILE = "attack_config.json"
+ATTACK_CONFIG_FLUSH_DELAY = 2
+
+# repeated channel updates are dropped (this many remembered); edits to one
+# message within the window are handled once, with the latest text
+UPDATE_DEDUPE_SIZE = 512
+UPDATE_COALESCE_WINDOW = 0.05
+
+# recent HeXamonbot messages kept in memory for battle status checks; a battle
+# counts as running while its last turn message is younger than the window
+RECENT_MESSAGES_SIZE = 32
+RECENT_BATTLE_WINDOW = 120
+
+# battle keyboard layouts remembered per account
+KEYBOARD_CACHE_SIZE = 32
+
+# finished battles, one SQLite file per account; /stats also shows the last HISTORY_WINDOW seconds
+HISTORY_FILE = "history/{name}.sqlite3"
+HISTORY_WINDOW = 3600
+
+# latency metrics ({name} is the account name)
+METRICS_FILE = "metrics/{name}.prom"
+METRICS_DUMP_INTERVAL = 60
 
 # messages
 BATTLE_START_PATTERN = "Battle begins!"
@@ -30,3 +133,6 @@ FORFEIT_PATTERN = "has not moved. Player forfeits and loses 15 💵"
 CURRENTLY_BATTLING_PATTERN = "You are currently battling"
 PRIZE_PATTERN = "Prize:"
 CHALLENGE_COMMAND = "/challenge@HeXamonbot"
+DAILY_LIMIT_PATTERN = "Daily limit for battling has been reached"
+DAILY_LIMIT_NO_PRIZE_PATTERN = "no prize will be given"
+PRIZE_CURRENCY = "💵"
@@ -0,0 +1,90 @@
+import json
+import logging
+import os
+import time
+from atomic_file import atomic_write_json
+from config import *
+
+logger = logging.getLogger(__name__)
+
+DAY = 24 * 3600
+
+
+class DailyLimitScheduler:
+    """Parks an account from a daily-limit hit until HeXamonbot's daily reset
+
+    The reset is assumed at DAILY_RESET_HOUR_UTC. If the first challenge after
+    waking hits the limit again, the reset is learned to be later by
+    DAILY_RESET_PROBE_STEP. The parked state and the learned offset survive
+    restarts.
+    """
+
+    def __init__(self, path, reset_hour=DAILY_RESET_HOUR_UTC, clock=time.time):
+        self.path = path
+        self.reset_hour = reset_hour
+        self.clock = clock
+        self.parked_until = None
+        self.woke_at = None
+        self.reset_offset = 0.0
+        self.hits = 0
+        self.load()
+
+    def next_reset(self, now):
+        """The first reset after `now`; today's when it is still ahead"""
+        # from yesterday's, since a large offset can push it past midnight
+        reset = now // DAY * DAY - DAY + self.reset_hour * 3600 + self.reset_offset
+        while reset <= now:
+            reset += DAY
+        return reset
+
+    def hit(self):
+        """Record a daily-limit reply; returns the seconds to stay parked"""
+        now = self.clock()
+        self.hits += 1
+        if self.woke_at is not None and now - self.woke_at < DAILY_RESET_PROBE_WINDOW:
+            # woke up too early, the reset comes later than we thought
+            self.reset_offset = min(DAY / 2, self.reset_offset + DAILY_RESET_PROBE_STEP)
+            logger.info(f"📅 Daily reset is later than expected, now {self.reset_offset / 60:.0f} min after {self.reset_hour:02d}:00 UTC")
+        self.woke_at = None
+        if self.parked_until is None or self.parked_until <= now:
+            self.parked_until = self.next_reset(now)
+        self.save()
+        return self.parked_until - now
+
+    def remaining(self):
+        """Seconds until the account may challenge again, 0 if not parked"""
+        if self.parked_until is None:
+            return 0.0
+        return max(0.0, self.parked_until - self.clock())
+
+    def wake(self):
+        self.parked_until = None
+        self.woke_at = self.clock()
+        self.save()
+
+    def describe(self):
+        if self.parked_until is None:
+            return f"not parked, {self.hits} hits"
+        until = time.strftime('%Y-%m-%d %H:%M UTC', time.gmtime(self.parked_until))
+        return f"parked until {until}, {self.hits} hits"
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    state = json.load(f)
+                self.parked_until = state.get('parked_until')
+                self.woke_at = state.get('woke_at')
+                self.reset_offset = state.get('reset_offset', 0.0)
+                if self.remaining() > 0:
+                    logger.info(f"📅 Daily limit still active, {self.describe()}")
+        except Exception as e:
+            logger.error(f"error loading daily limit state: {e}")
+
+    def save(self):
+        """Atomically persist the parked state"""
+        try:
+            atomic_write_json(self.path, {'parked_until': self.parked_until, 'woke_at': self.woke_at,
+                                          'reset_offset': self.reset_offset})
+        except Exception as e:
+            logger.error(f"Error saving daily limit state: {e}")
@@ -0,0 +1,89 @@
+import logging
+import re
+from collections import OrderedDict
+from telethon.tl.types import KeyboardButtonCallback
+from config import *
+
+logger = logging.getLogger(__name__)
+
+_NOT_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_move(name):
+    """'Double-Edge' and 'double edge' both become 'doubleedge'"""
+    return _NOT_ALNUM.sub('', name.lower())
+
+
+class KeyboardLayout:
+    """One battle keyboard: callback data by position and by move name"""
+
+    def __init__(self, rows):
+        self.by_position = {}
+        self.by_name = {}
+        self.names = []
+        for i, row in enumerate(rows):
+            for j, button in enumerate(row.buttons):
+                if isinstance(button, KeyboardButtonCallback):
+                    self.by_position[(i, j)] = button
+                    self.by_name.setdefault(normalize_move(button.text), button)
+                    self.names.append(button.text)
+
+    def find(self, move=None, row=None, col=None):
+        """The button for a move name, falling back to a position; None if neither is on the keyboard"""
+        if move:
+            key = normalize_move(move)
+            button = self.by_name.get(key)
+            if button is None:
+                # "double" for "Double-Edge", or a label with PP after the name
+                button = next((b for name, b in self.by_name.items() if name.startswith(key)), None)
+            if button is not None:
+                return button
+        if row is None or col is None:
+            return None
+        return self.by_position.get((row, col))
+
+    def describe(self):
+        return ", ".join(f"[{i}][{j}] {b.text}" for (i, j), b in self.by_position.items())
+
+
+class KeyboardIndex:
+    """Layouts by a hash of their buttons, so every turn after the first is a dict lookup"""
+
+    def __init__(self, size=KEYBOARD_CACHE_SIZE):
+        self.size = size
+        self.layouts = OrderedDict()
+        self.last_markup = None
+        self.last_layout = None
+        self.hits = 0
+        self.misses = 0
+
+    def layout(self, markup):
+        if markup is self.last_markup:
+            # a retry of the same message
+            self.hits += 1
+            return self.last_layout
+        signature = hash(tuple(
+            (button.text, getattr(button, 'data', None))
+            for row in markup.rows for button in row.buttons
+        ))
+        layout = self.layouts.get(signature)
+        if layout is None:
+            self.misses += 1
+            layout = self.layouts[signature] = KeyboardLayout(markup.rows)
+            if len(self.layouts) > self.size:
+                self.layouts.popitem(last=False)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"🔍 New keyboard layout: {layout.describe()}")
+        else:
+            self.hits += 1
+            self.layouts.move_to_end(signature)
+        self.last_markup = markup
+        self.last_layout = layout
+        return layout
+
+    def known_moves(self):
+        """Move names seen on any cached keyboard"""
+        return {name for layout in self.layouts.values() for name in layout.names}
+
+    def stats(self):
+        return {'layouts': len(self.layouts), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,118 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import time
+from config import *
+
+_listener = None
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Hands the raw record to the queue; formatting happens on the listener thread"""
+
+    def prepare(self, record):
+        return record
+
+
+class CallSiteRateLimiter(logging.Filter):
+    """Lets at most `burst` DEBUG records through per call site every `interval` seconds
+
+    Only debug lines are sampled: info lines such as state transitions and
+    prizes are shared by every account in the process and must all get through.
+    """
+
+    def __init__(self, burst=LOG_SAMPLE_BURST, interval=LOG_SAMPLE_INTERVAL):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.sites = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        site = (record.pathname, record.lineno)
+        now = time.monotonic()
+        window_start, count, suppressed = self.sites.get(site, (now, 0, 0))
+        if now - window_start >= self.interval:
+            window_start, count = now, 0
+        if count >= self.burst:
+            self.sites[site] = (window_start, count, suppressed + 1)
+            return False
+        if suppressed:
+            record.suppressed = suppressed
+        self.sites[site] = (window_start, count + 1, 0)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            entry['suppressed'] = suppressed
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class ConsoleFormatter(logging.Formatter):
+    def format(self, record):
+        line = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            line += f" (+{suppressed} similar suppressed)"
+        return line
+
+
+def setup_logging(level=LOG_LEVEL, log_file=LOG_FILE, json_file=LOG_JSON):
+    """Route all logging through a queue to a background thread with console and rotating file output
+
+    Safe to call again (e.g. in a worker process) to point the file elsewhere.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    console = logging.StreamHandler()
+    console.setFormatter(ConsoleFormatter('%(asctime)s - %(message)s'))
+    handlers = [console]
+    if log_file:
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+        )
+        file_handler.setFormatter(JsonFormatter() if json_file else ConsoleFormatter('%(asctime)s - %(levelname)s - %(message)s'))
+        handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(CallSiteRateLimiter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Flush everything still queued"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
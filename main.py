@@ -2,51 +2,127 @@ import asyncio
 import logging
 import re
 import os
-import json
-from telethon import TelegramClient, events
-from telethon.tl.types import KeyboardButtonCallback
-from telethon.errors import FloodWaitError, ChatAdminRequiredError
+from telethon import TelegramClient, events, utils
+from telethon.tl.functions.messages import GetBotCallbackAnswerRequest
+from telethon.errors import ChatAdminRequiredError
 import time
+from collections import Counter
+from types import SimpleNamespace
 from config import *
+from classifier import CLICK_KINDS, EventKind, classify
+from peer_cache import PEER_INVALID_ERRORS
+from retry import RetryEngine, RetryPolicy, RetryableError
+from battle_state import BattleState
+from metrics import StageMetrics
+from pacing import Pacing, PacingController
+from ratelimit import RateLimiter
+from logging_setup import setup_logging
+from attack_store import get_attack_store
+from keyboard_index import KeyboardIndex, normalize_move
+from update_dedupe import UpdateDeduper
+from command_router import CommandRouter
+from battle_history import BattleHistory
+from battle_message import parse_message
+from move_policy import MoveDamage, make_policy
+from recent_messages import message_age
+from daily_limit import DailyLimitScheduler
+from session_store import open_session
+from reconnect import ReconnectSupervisor
+from targets import BattleTarget, load_targets
 
-# logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+# logging (queued, written by a background thread)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 class BlisseyBot:
-    def __init__(self, api_id, api_hash, session_file='blissey_session.session'):
-        self.client = TelegramClient(session_file, api_id, api_hash)
-        self.target_channel = TARGET_CHANNEL
+    def __init__(self, api_id, api_hash, session_file='blissey_session.session', name=None,
+                 attack_row=BATTLE_BUTTON_ROW, attack_col=BATTLE_BUTTON_COL, client=None, auto_run=AUTO_RUN,
+                 targets=None):
+        # a ready-made client (e.g. simulator.SimulatedClient) skips the session file
+        self.client = client or TelegramClient(session_file, api_id, api_hash)
+        self.name = name or 'blissey'
+        self.attack_row = attack_row
+        self.attack_col = attack_col
+        self.auto_run = auto_run
+        self.last_error = None
+        self.started_at = time.monotonic()
+        self.events = Counter()
+        self.metrics = StageMetrics(self.name)
+        self.metrics_file = METRICS_FILE.format(name=self.name)
+        self.metrics_task = None
         self.bot_username = BOT_USERNAME
-        self.target_message_id = TARGET_MESSAGE_ID
+        # the first post keeps the account's peer cache file from single-post runs
+        self.targets = [
+            BattleTarget(self.client, self.name, channel, message_id, self.bot_username,
+                         peer_path=PEER_CACHE_FILE.format(name=self.name if index == 0 else f"{self.name}-{index}"))
+            for index, (channel, message_id) in enumerate(load_targets(targets))
+        ]
+        # the post being farmed right now; the others wait their turn
+        self.target = self.targets[0]
+        self.targets_by_chat = {}
         self.is_running = False
-        self.current_battle = False
-        self.challenge_sent_time = None
-        self.battle_timeout_task = None
-        self.attack_config_file = 'attack_config.json'
-        self.load_attack_config()
+        self.stopped = asyncio.Event()
+        self.history = BattleHistory(HISTORY_FILE.format(name=self.name))
+        # damage learned in earlier runs, so the move policy need not try moves out again
+        self.move_damage = MoveDamage()
+        self.move_damage.load(self.history.recorded_turns(limit=MOVE_DAMAGE_SAMPLES * 20))
+        self.policy = make_policy(MOVE_POLICY, self.move_damage)
+        self.connection = ReconnectSupervisor(self.client, self.metrics,
+                                              on_lost=self.mark_gap, on_restored=self.catch_up)
+        self.connection_task = None
+        self.daily = DailyLimitScheduler(DAILY_LIMIT_FILE.format(name=self.name))
+        self.pacing = Pacing(PACING_FILE.format(name=self.name), [
+            PacingController('smooth', SMOOTH_DELAY, SMOOTH_DELAY_FLOOR, SMOOTH_DELAY_CEILING,
+                             PACING_STEP, PACING_BACKOFF, PACING_STREAK),
+            PacingController('restart', RESTART_DELAY, RESTART_DELAY_FLOOR, RESTART_DELAY_CEILING,
+                             PACING_STEP, PACING_BACKOFF, PACING_STREAK),
+            PacingController('retry', BUTTON_RETRY_DELAY, BUTTON_RETRY_DELAY_FLOOR, BUTTON_RETRY_DELAY_CEILING,
+                             PACING_STEP, PACING_BACKOFF, PACING_STREAK),
+        ])
+        self.limiter = RateLimiter(RATE_LIMITS, on_flood=self.on_flood_wait)
+        self.retry = RetryEngine(RetryPolicy(
+            base_delay=self.pacing.retry.delay,
+            factor=RETRY_BACKOFF_FACTOR,
+            max_delay=RETRY_MAX_DELAY,
+            jitter=RETRY_JITTER
+        ))
+        self.attack_config = get_attack_store()
+        # the logged-in user ID, known once start() has run
+        self.user_key = None
+        self.keyboards = KeyboardIndex()
+        self.updates = UpdateDeduper(would_click=lambda message: classify(message.text or "") in CLICK_KINDS)
         self.automation_running = False
-        
-    def load_attack_config(self):
-        try:
-            if os.path.exists(self.attack_config_file):
-                with open(self.attack_config_file, 'r') as f:
-                    self.attack_config = json.load(f)
-                logger.info("attack config loaded")
-            else:
-                self.attack_config = {}
-                logger.info("no attack config found")
-        except Exception as e:
-            logger.error(f"error loading attack config: {e}")
-            self.attack_config = {}
+        self.commands = CommandRouter()
+        self.commands.add('custom', self.handle_custom_command)
+        self.commands.add('run', self.handle_run_command)
+        self.commands.add('pause', self.handle_pause_command)
+        self.commands.add('guide', self.handle_guide_command)
+        self.commands.add('set_attack', self.handle_set_attack_command)
+        self.commands.add('stats', self.handle_stats_command)
     
-    def get_user_attack_config(self, user_id):
-        user_config = self.attack_config.get(str(user_id))
-        if user_config:
-            return user_config['row'], user_config['col']
-        else:
-            # Default to row 2, column 1 (Attack 3)
-            return BATTLE_BUTTON_ROW, BATTLE_BUTTON_COL
+    def get_user_attack_config(self, user_key):
+        """Move name, row and column for `user_key`, then the legacy "default" entry, then the account default"""
+        entry = self.attack_config.get(user_key) or self.attack_config.get("default")
+        if entry:
+            return entry.get('move'), entry.get('row'), entry.get('col')
+        # Account default (row 2, column 1 / Attack 3 unless overridden)
+        return None, self.attack_row, self.attack_col
+    
+    def status(self):
+        """Snapshot of this account for status views"""
+        return {
+            'name': self.name,
+            'connected': self.client.is_connected(),
+            'automation': self.automation_running,
+            'state': self.target.battle.state.value,
+            'pending': self.target.battle.pending,
+            'target': self.target.label,
+            'events': dict(self.events),
+            'uptime': time.monotonic() - self.started_at,
+            'retries': self.retry.stats(),
+            'reconnects': self.connection.stats(),
+            'last_error': self.last_error,
+        }
         
     async def start(self):
         """Start the bot and connect to Telegram"""
@@ -54,155 +130,311 @@ class BlisseyBot:
             await self.client.start()
             logger.info("✅ Connected to Telegram successfully!")
             
-            # Get user info
-            me = await self.client.get_me()
+            # The lookups below are independent, so they run concurrently. Peers
+            # saved by an earlier run skip resolving, and the caches warm meanwhile
+            warm = all([target.peers.load() for target in self.targets])
+            me, _ = await asyncio.gather(
+                self.client.get_me(),
+                self.warm_caches() if warm else self.resolve_channels()
+            )
+            self.user_key = str(me.id)
             logger.info(f"👤 Logged in as: {me.first_name} (@{me.username})")
-            
-            # Test channel access
-            try:
-                channel = await self.client.get_entity(self.target_channel)
-                logger.info(f"📺 Channel found: {channel.title} (@{channel.username})")
-            except Exception as e:
-                logger.error(f"❌ Cannot access channel {self.target_channel}: {e}")
+            reachable = [target for target in self.targets if target.peers.channel is not None]
+            if not reachable:
                 logger.info("💡 Try using the full channel link or channel ID")
                 logger.info("💡 Make sure you're a member of the channel")
+                await self.client.disconnect()
                 return
+            if len(reachable) < len(self.targets):
+                skipped = ", ".join(target.label for target in self.targets if target not in reachable)
+                logger.warning(f"⚠️ Skipping posts in channels we cannot access: {skipped}")
+                self.targets = reachable
+                self.target = reachable[0]
+            if not warm:
+                await self.warm_caches()
+            for target in self.targets:
+                logger.info(f"📺 Channel found: {target.peers.channel_title} (post {target.message_id})")
             
             # Set up event handlers
             self.setup_handlers()
+            self.metrics_task = asyncio.create_task(self.save_state_periodically())
+            self.connection_task = asyncio.create_task(self.connection.watch())
+            
+            if self.auto_run:
+                logger.info("🚀 Automation started automatically (AUTO_RUN)")
+                await self.run_automation()
             
             # Start the automation
             await self.start_automation()
             
         except Exception as e:
             logger.error(f"❌ Failed to start bot: {e}")
+            self.last_error = f"start: {e}"
             
+    async def resolve_channels(self):
+        await asyncio.gather(*(self.resolve_channel(target) for target in self.targets))
+    
+    async def resolve_channel(self, target):
+        """Test channel access and cache the peers for the hot path"""
+        try:
+            await target.peers.resolve()
+        except Exception as e:
+            logger.error(f"❌ Cannot access channel {target.channel_ref}: {e}")
+            self.last_error = f"channel access: {e}"
+            target.peers.invalidate()
+    
+    async def warm_caches(self):
+        """Fill the recent messages buffers and keyboard index before the first update arrives"""
+        await asyncio.gather(*(self.warm_cache(target) for target in self.targets))
+    
+    async def warm_cache(self, target):
+        try:
+            try:
+                await self.backfill_recent_messages(target, asyncio.get_running_loop().time())
+            except PEER_INVALID_ERRORS as e:
+                logger.warning(f"🔗 Saved channel peer is stale ({e}), resolving again...")
+                await self.resolve_channel(target)
+                if target.peers.channel is None:
+                    return
+                await self.backfill_recent_messages(target, asyncio.get_running_loop().time())
+        except Exception as e:
+            logger.error(f"❌ Error warming caches: {e}")
+    
     def setup_handlers(self):
         """Set up event handlers for message monitoring"""
+        # Filter on the cached numeric IDs so Telethon drops human chatter
+        # before our handler runs, with no sender lookup
+        self.targets_by_chat = {}
+        for target in self.targets:
+            self.targets_by_chat.setdefault(utils.get_peer_id(target.peers.channel), []).append(target)
+        channels = [targets[0].peers.channel for targets in self.targets_by_chat.values()]
+        bot_id = self.target.peers.bot_id
         
-        @self.client.on(events.NewMessage(chats=self.target_channel))
+        # HeXamonbot edits battle messages in place, so both feed one deduper
+        @self.client.on(events.NewMessage(chats=channels, from_users=bot_id))
         async def handle_new_message(event):
-            await self.process_message(event)
+            await self.updates.submit(event, self.process_message, self.metrics.trace())
             
-        @self.client.on(events.MessageEdited(chats=self.target_channel))
+        @self.client.on(events.MessageEdited(chats=channels, from_users=bot_id))
         async def handle_edited_message(event):
-            await self.process_message(event)
-        
-        @self.client.on(events.NewMessage(pattern='/custom'))
-        async def handle_custom_command(event):
-            await self.handle_custom_command(event)
-        
-        @self.client.on(events.NewMessage(pattern='/run'))
-        async def handle_run_command(event):
-            await self.handle_run_command(event)
-        
-        @self.client.on(events.NewMessage(pattern='/pause'))
-        async def handle_pause_command(event):
-            await self.handle_pause_command(event)
-        
-        @self.client.on(events.NewMessage(pattern='/guide'))
-        async def handle_guide_command(event):
-            await self.handle_guide_command(event)
-        
-        @self.client.on(events.NewMessage(pattern='/set_attack'))
-        async def handle_set_attack_command(event):
-            await self.handle_set_attack_command(event)
+            await self.updates.submit(event, self.process_message, self.metrics.trace())
         
+        # Self-commands are only typed by this account, so incoming messages
+        # never reach the router, and outgoing ones are parsed once
+        @self.client.on(events.NewMessage(outgoing=True))
+        async def handle_command(event):
+            await self.commands.dispatch(event)
+    
+    def target_for(self, message):
+        """The post a HeXamonbot message belongs to, None for chats we do not farm"""
+        targets = self.targets_by_chat.get(message.chat_id)
+        if not targets:
+            return None
+        if len(targets) > 1:
+            # several posts in one channel: the reply to our challenge tells which
+            reply_to = getattr(message, 'reply_to_msg_id', None)
+            for target in targets:
+                if reply_to is not None and reply_to == target.last_challenge_id:
+                    return target
+            if self.target in targets:
+                return self.target
+        return targets[0]
     
-    async def process_message(self, event):
+    async def process_message(self, event, trace=None):
         """Process incoming messages and handle bot interactions"""
+        if trace is None:
+            trace = self.metrics.trace()
+        else:
+            # started by the update handler, before the coalesce window
+            trace.mark('coalesced')
         try:
-            # Only process messages if automation is running
-            if not self.automation_running:
-                return
-                
             message = event.message
             text = message.text or ""
-            sender = await message.get_sender()
             
-            # Check if message is from HeXamonbot
-            if sender and hasattr(sender, 'username') and sender.username == self.bot_username:
-                logger.info(f"🤖 Bot message: {text[:100]}...")
+            # Handlers are registered with from_users=bot_id, this is just a cheap guard
+            if message.sender_id == self.target.peers.bot_id:
+                target = self.target_for(message)
+                if target is None:
+                    return
+                # parsed once here; clicks, stats and the history all read this record
+                parsed = parse_message(text)
+                kind = parsed.kind
+                # kept even while paused, so battle status checks stay zero-RPC
+                target.recent.add(asyncio.get_running_loop().time(), message.id, kind)
+                target.last_seen_id = max(target.last_seen_id, message.id)
+                if message.id not in target.handled_ids:
+                    target.handled_ids.append(message.id)
+                # the channel is shared with other players: a battle is ours when
+                # HeXamonbot started it in reply to our /challenge, and its turns
+                # are edits of that battle message
+                in_our_battle = (target.battle.state is BattleState.IN_BATTLE
+                                 and message.id == target.battle_message_id)
+                answers_us = (target.last_challenge_id is not None
+                              and getattr(message, 'reply_to_msg_id', None) == target.last_challenge_id)
+                if kind in CLICK_KINDS and (in_our_battle or target.battle.state is not BattleState.IN_BATTLE):
+                    if in_our_battle:
+                        damage = self.move_damage.observe(target.last_state, parsed)
+                        if damage is not None:
+                            self.history.record_turn(parsed.own_move, target.last_state.opponent_hp, damage)
+                    target.last_turn_message = message
+                    target.last_state = parsed
+                
+                # Only act on messages if automation is running
+                if not self.automation_running:
+                    return
                 
-                # Debug: Log full message for forfeit detection
-                if "forfeits" in text.lower() or "has not moved" in text.lower():
-                    logger.info(f"🔍 Full forfeit message: {text}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"🤖 Bot message: {text[:100]}...")
+                self.metrics.message_seen()
+                trace.mark('classified')
+                self.events[kind.value] += 1
                 
-                # Check for battle start
-                if BATTLE_START_PATTERN.lower() in text.lower():
+                # Every delay below is a cancellable timer on the state machine,
+                # so the handler returns at once and a newer message wins
+                if kind in CLICK_KINDS and not (in_our_battle or answers_us):
+                    # someone else's battle; it must not replace our pending timer
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"👀 Turn of another battle on {target.label} (message {message.id}), ignored")
+                    
+                elif kind is EventKind.BATTLE_START:
                     logger.info("⚔️ Battle started! Looking for buttons...")
-                    self.current_battle = True
-                    self.challenge_sent_time = None  # Reset challenge timer
-                    # Cancel any pending battle timeout
-                    if self.battle_timeout_task:
-                        self.battle_timeout_task.cancel()
-                        self.battle_timeout_task = None
-                    await asyncio.sleep(SMOOTH_DELAY)  # Smooth delay
-                    await self.click_battle_button(message)
+                    self.enter_battle(target, "battle begins", message)
+                    target.battle_turns = 1
+                    self.schedule_click(target, message, trace, parsed)
+                    
+                elif kind in CLICK_KINDS and not in_our_battle:
+                    # HeXamonbot edits the battle message in place, so a battle that began
+                    # while we were offline shows up as a later turn, never as its start
+                    logger.info(f"⚔️ Battle already under way on {target.label}, joining it")
+                    self.enter_battle(target, "joined mid-battle", message)
+                    target.battle_turns = 1
+                    self.schedule_click(target, message, trace, parsed)
                     
-                # Check for Blissey switch
-                elif BLISSEY_SWITCH_PATTERN.lower() in text.lower():
-                    logger.info("🔄 Blissey switched! Clicking button again...")
-                    await asyncio.sleep(SMOOTH_DELAY)  # Smooth delay
-                    await self.click_battle_button(message)
+                elif kind is EventKind.BLISSEY_SWITCH:
+                    logger.info(f"🔄 Blissey switched! Clicking button again... (HP {parsed.opponent_hp}/{parsed.opponent_max_hp})")
+                    target.battle_turns += 1
+                    self.schedule_click(target, message, trace, parsed)
                     
-                # Check for Blissey Double-Edge
-                elif BLISSEY_DOUBLE_EDGE_PATTERN.lower() in text.lower():
-                    logger.info("⚔️ Blissey used Double-Edge! Clicking button again...")
-                    await asyncio.sleep(SMOOTH_DELAY)  # Smooth delay
-                    await self.click_battle_button(message)
+                elif kind is EventKind.BLISSEY_MOVE:
+                    logger.info(f"⚔️ Blissey used {parsed.opponent_move}! Clicking button again... "
+                                f"(HP {parsed.opponent_hp}/{parsed.opponent_max_hp})")
+                    target.battle_turns += 1
+                    self.schedule_click(target, message, trace, parsed)
                     
-                # Check for forfeit message (multiple patterns)
-                elif (FORFEIT_PATTERN.lower() in text.lower() or 
-                      "has not moved" in text.lower() and "forfeits" in text.lower() and "loses 15" in text.lower()):
+                elif kind in (EventKind.FORFEIT, EventKind.PRIZE) and not self.ends_our_battle(target, message):
+                    # another player's battle ended; not ours to count or react to
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"👀 {kind.value} of another battle on {target.label}, ignored")
+                    
+                elif kind is EventKind.FORFEIT:
                     logger.info("💸 Player forfeited! Sending new challenge...")
-                    logger.info(f"🔍 Forfeit detected in: {text[:50]}...")
-                    self.current_battle = False
-                    self.challenge_sent_time = None  # Reset challenge timer
-                    # Cancel any pending battle timeout
-                    if self.battle_timeout_task:
-                        self.battle_timeout_task.cancel()
-                        self.battle_timeout_task = None
-                    await asyncio.sleep(SMOOTH_DELAY)  # Smooth delay
-                    await self.send_challenge_command()
+                    logger.debug(f"🔍 Full forfeit message: {text}")
+                    self.retry.cancel()
+                    self.record_battle(target, 'forfeit', -parsed.penalty)
+                    target.battle.transition(BattleState.COOLDOWN, "forfeit")
+                    self.challenge_next(target, self.pacing.smooth.delay)
+                    
+                elif (kind in (EventKind.CURRENTLY_BATTLING, EventKind.DAILY_LIMIT)
+                      and getattr(message, 'reply_to_msg_id', None) not in (None, target.last_challenge_id)):
+                    # the answer to someone else's /challenge
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"👀 Reply to another player's challenge on {target.label}, ignored")
+                    
+                elif kind is EventKind.CURRENTLY_BATTLING:
+                    logger.info(f"⚔️ Currently battling detected! Resting {target.label} for {CURRENTLY_BATTLING_COOLDOWN} seconds...")
+                    logger.debug(f"🔍 Message: {text[:50]}...")
+                    target.battle.transition(BattleState.COOLDOWN, "currently battling")
+                    if target.awaiting_battle:
+                        target.awaiting_battle = False
+                        self.pacing.pushback("currently battling", 'restart')
+                    self.challenge_next(target, CURRENTLY_BATTLING_COOLDOWN)
                     
-                # Check for currently battling message
-                elif CURRENTLY_BATTLING_PATTERN.lower() in text.lower():
-                    logger.info("⚔️ Currently battling detected! Waiting 2 minutes...")
-                    logger.info(f"🔍 Message: {text[:50]}...")
-                    # Cancel any pending battle timeout
-                    if self.battle_timeout_task:
-                        self.battle_timeout_task.cancel()
-                        self.battle_timeout_task = None
-                    # Wait 2 minutes (120 seconds)
-                    await asyncio.sleep(120)
-                    logger.info("⏰ 2 minutes passed, sending new challenge...")
-                    await self.send_challenge_command()
-                # Check for daily limit reached message
-                elif "Daily limit for battling has been reached" in text and "no prize will be given" in text:
-                    logger.info("📅 Daily limit reached, sending new challenge...")
-                    await asyncio.sleep(3)
-                    await self.send_challenge_command()
+                elif kind is EventKind.DAILY_LIMIT:
+                    logger.info("📅 Daily limit reached, no prizes until the reset")
+                    self.history.record('daily_limit')
+                    target.awaiting_battle = False
+                    self.park_until_reset(self.daily.hit(), target)
                     
-                # Check for prize message
-                elif PRIZE_PATTERN.lower() in text.lower() and "💵" in text:
+                elif kind is EventKind.PRIZE:
                     logger.info("💰 Prize received! Restarting automation...")
-                    self.current_battle = False
-                    self.challenge_sent_time = None  # Reset challenge timer
-                    # Cancel any pending battle timeout
-                    if self.battle_timeout_task:
-                        self.battle_timeout_task.cancel()
-                        self.battle_timeout_task = None
-                    await asyncio.sleep(RESTART_DELAY)  # Wait before restarting
-                    await self.send_challenge_command()
+                    self.retry.cancel()
+                    self.record_battle(target, 'prize', parsed.prize)
+                    target.battle.transition(BattleState.COOLDOWN, "prize")
+                    self.challenge_next(target, self.pacing.restart.delay)
                     
         except Exception as e:
             logger.error(f"❌ Error processing message: {e}")
     
-    async def handle_custom_command(self, event):
+    def challenge_next(self, target, rest):
+        """Rest `target` for `rest` seconds and challenge whichever post is ready first
+        
+        With a single post this is a plain wait; with several, the account moves
+        on to a rested post instead of sitting out the cooldown.
+        """
+        now = asyncio.get_running_loop().time()
+        target.rest(now, rest)
+        ready = min((t for t in self.targets if not t.busy), key=lambda t: t.ready_at, default=target)
+        delay = max(0.0, ready.ready_at - now)
+        if ready is not target:
+            logger.info(f"🔁 [{self.name}] {target.label} rests {rest:.0f}s, moving on to {ready.label}")
+            # switching posts needs no cooldown, just the usual pause between actions
+            delay = max(delay, self.pacing.smooth.delay)
+        self.target = ready
+        ready.battle.schedule(delay, lambda: self.send_challenge_command(ready), "challenge")
+    
+    def park_until_reset(self, delay, target=None):
+        """Send nothing until the daily reset, then challenge again"""
+        target = target or self.target
+        if target.battle.state is not BattleState.DAILY_LIMITED:
+            target.battle.transition(BattleState.DAILY_LIMITED, "daily limit")
+        target.battle.schedule(delay, lambda: self.resume_after_daily_limit(target), "daily reset")
+        logger.info(f"📅 [{self.name}] {self.daily.describe()} (in {delay / 3600:.1f}h)")
+    
+    async def resume_after_daily_limit(self, target):
+        logger.info(f"🌅 [{self.name}] Daily reset, challenging again")
+        self.daily.wake()
+        target.battle.transition(BattleState.IDLE, "daily reset")
+        await self.send_challenge_command(target)
+    
+    def enter_battle(self, target, reason, message):
+        """Move `target` into the battle of `message` with a fresh retry deadline"""
+        target.battle.transition(BattleState.IN_BATTLE, reason)
+        target.battle_message_id = message.id
+        if target.awaiting_battle:
+            # the last challenge went through first time
+            target.awaiting_battle = False
+            self.pacing.success('restart')
+        target.battle_started_at = asyncio.get_running_loop().time()
+        target.battle_deadline = target.battle_started_at + BATTLE_RETRY_DEADLINE
+    
+    def ends_our_battle(self, target, message):
+        """Whether a prize or forfeit message ends the battle this account fights on `target`"""
+        if target.battle.state is not BattleState.IN_BATTLE or target.battle_message_id is None:
+            return False
+        # the outcome comes as a new message; when it is a reply, it must be to our battle
+        reply_to = getattr(message, 'reply_to_msg_id', None)
+        return reply_to is None or reply_to in (target.battle_message_id, target.last_challenge_id)
+    
+    def record_battle(self, target, outcome, amount):
+        """Add the battle that just ended on `target` to the history"""
+        duration = 0.0
+        if target.battle_started_at is not None:
+            duration = asyncio.get_running_loop().time() - target.battle_started_at
+        self.history.record(outcome, amount=amount, turns=target.battle_turns, duration=duration)
+        target.battles += 1
+        target.battle_started_at = None
+        target.battle_message_id = None
+        target.battle_turns = 0
+    
+    def schedule_click(self, target, message, trace=None, state=None):
+        """Click the attack button after the learned smooth delay unless something newer arrives"""
+        target.battle.schedule(self.pacing.smooth.delay,
+                               lambda: self.click_battle_button(target, message, trace, state), "click")
+    
+    async def handle_custom_command(self, event, args=""):
         """Handle /custom command"""
         try:
-            await event.edit(
+            await self.edit_command(event, 
                 "╔══════════════════════════════════════════════════════════════╗\n"
                 "║                    ⚔️ ATTACK SELECTION ⚔️                   ║\n"
                 "╠══════════════════════════════════════════════════════════════╣\n"
@@ -223,6 +455,7 @@ class BlisseyBot:
                 "║  │ /set_attack 2 - for Attack 2                          │  ║\n"
                 "║  │ /set_attack 3 - for Attack 3 (default)                │  ║\n"
                 "║  │ /set_attack 4 - for Attack 4                          │  ║\n"
+                "║  │ /set_attack Double-Edge - by move name                │  ║\n"
                 "║  └────────────────────────────────────────────────────────┘  ║\n"
                 "║                                                              ║\n"
                 "╚══════════════════════════════════════════════════════════════╝"
@@ -231,11 +464,11 @@ class BlisseyBot:
         except Exception as e:
             logger.error(f"Error handling custom command: {e}")
     
-    async def handle_run_command(self, event):
+    async def handle_run_command(self, event, args=""):
         """Handle /run command"""
         try:
             if self.automation_running:
-                await event.edit(
+                await self.edit_command(event, 
                     "╔══════════════════════════════════╗\n"
                     "║        ⚠️  ALREADY ACTIVE ⚠️      ║\n"
                     "╠══════════════════════════════════╣\n"
@@ -246,10 +479,9 @@ class BlisseyBot:
                 )
                 return
             
-            self.automation_running = True
             logger.info("🚀 Automation started by user command")
             
-            await event.edit(
+            await self.edit_command(event, 
                 "╔══════════════════════════════════╗\n"
                 "║        🚀 BLISSEY BOT 🚀         ║\n"
                 "╠══════════════════════════════════╣\n"
@@ -261,17 +493,33 @@ class BlisseyBot:
                 "╚══════════════════════════════════╝"
             )
             
-            # Send challenge command immediately
-            await self.send_challenge_command()
+            await self.run_automation()
             
         except Exception as e:
             logger.error(f"Error handling run command: {e}")
     
-    async def handle_pause_command(self, event):
+    async def run_automation(self):
+        """Turn automation on: pick up a running battle, or challenge the most rested post right away"""
+        self.automation_running = True
+        now = asyncio.get_running_loop().time()
+        for target in self.targets:
+            message = target.last_turn_message
+            if message is not None and message.reply_markup and target.recent.battle_active(now):
+                logger.info(f"⚔️ Battle already running on {target.label}, clicking instead of challenging")
+                self.target = target
+                self.enter_battle(target, "resumed", message)
+                # its edits are ours to follow now, also through a catch-up
+                if message.id not in target.handled_ids:
+                    target.handled_ids.append(message.id)
+                self.schedule_click(target, message, state=target.last_state)
+                return
+        await self.send_challenge_command(min(self.targets, key=lambda t: t.ready_at))
+    
+    async def handle_pause_command(self, event, args=""):
         """Handle /pause command"""
         try:
             if not self.automation_running:
-                await event.edit(
+                await self.edit_command(event, 
                     "╔══════════════════════════════════╗\n"
                     "║        ⏸️  ALREADY PAUSED ⏸️      ║\n"
                     "╠══════════════════════════════════╣\n"
@@ -283,17 +531,17 @@ class BlisseyBot:
                 return
             
             self.automation_running = False
-            self.current_battle = False
-            self.challenge_sent_time = None
             
-            # Cancel any pending battle timeout
-            if self.battle_timeout_task:
-                self.battle_timeout_task.cancel()
-                self.battle_timeout_task = None
+            # Cancel any pending timers and retries
+            for target in self.targets:
+                target.battle.cancel_timer()
+                if target.battle.state is not BattleState.IDLE:
+                    target.battle.transition(BattleState.IDLE, "paused")
+            self.retry.cancel()
             
             logger.info("⏸️ Automation paused by user command")
             
-            await event.edit(
+            await self.edit_command(event, 
                 "╔══════════════════════════════════╗\n"
                 "║        ⏸️  BOT PAUSED ⏸️         ║\n"
                 "╠══════════════════════════════════╣\n"
@@ -308,7 +556,7 @@ class BlisseyBot:
         except Exception as e:
             logger.error(f"Error handling pause command: {e}")
     
-    async def handle_guide_command(self, event):
+    async def handle_guide_command(self, event, args=""):
         """Handle /guide command"""
         try:
             guide_text = """
@@ -322,11 +570,13 @@ class BlisseyBot:
 ║  │ /pause   - ⏸️ Stop automation                         │  ║
 ║  │ /custom  - ⚙️ Configure attack selection             │  ║
 ║  │ /guide   - 📖 Show this guide                         │  ║
+║  │ /stats   - 📊 Latency and battle stats                │  ║
 ║  └────────────────────────────────────────────────────────┘  ║
 ║                                                              ║
 ║  ⚔️ ATTACK CONFIGURATION:                                   ║
 ║  ┌────────────────────────────────────────────────────────┐  ║
 ║  │ Use /set_attack 1-4 to choose your battle button      │  ║
+║  │ or /set_attack <move name>, e.g. Double-Edge          │  ║
 ║  │ Default: Attack 3 (Row 2, Column 1)                   │  ║
 ║  │ Options: Attack 1, 2, 3, or 4                        │  ║
 ║  └────────────────────────────────────────────────────────┘  ║
@@ -350,26 +600,24 @@ class BlisseyBot:
 ╚══════════════════════════════════════════════════════════════╝
             """
             
-            await event.edit(guide_text)
+            await self.edit_command(event, guide_text)
             
         except Exception as e:
             logger.error(f"Error handling guide command: {e}")
     
-    async def handle_set_attack_command(self, event):
-        """Handle /set_attack command"""
+    async def handle_set_attack_command(self, event, args=""):
+        """Handle /set_attack command; `args` is what follows the command"""
         try:
-            message_text = event.message.text
             user_id = event.sender_id
+            parts = args.split()
             
-            # Parse attack number from command
-            parts = message_text.split()
-            if len(parts) < 2:
-                await event.edit(
+            if not parts:
+                await self.edit_command(event, 
                     "╔══════════════════════════════════════════════════════════════╗\n"
                     "║                    ❌ INVALID COMMAND ❌                   ║\n"
                     "╠══════════════════════════════════════════════════════════════╣\n"
                     "║                                                              ║\n"
-                    "║  📝 USAGE: /set_attack <number>                            ║\n"
+                    "║  📝 USAGE: /set_attack <number or move name>               ║\n"
                     "║                                                              ║\n"
                     "║  🎯 AVAILABLE OPTIONS:                                     ║\n"
                     "║  ┌────────────────────────────────────────────────────────┐  ║\n"
@@ -384,29 +632,14 @@ class BlisseyBot:
                 return
             
             try:
-                attack_num = int(parts[1])
+                attack_num = int(parts[0])
             except ValueError:
-                await event.edit(
-                    "╔══════════════════════════════════════════════════════════════╗\n"
-                    "║                ❌ INVALID ATTACK NUMBER ❌                 ║\n"
-                    "╠══════════════════════════════════════════════════════════════╣\n"
-                    "║                                                              ║\n"
-                    "║  ⚠️ Use number from 1 to 4 only!                           ║\n"
-                    "║                                                              ║\n"
-                    "║  🎯 VALID OPTIONS:                                         ║\n"
-                    "║  ┌────────────────────────────────────────────────────────┐  ║\n"
-                    "║  │ /set_attack 1 - Attack 1                             │  ║\n"
-                    "║  │ /set_attack 2 - Attack 2                             │  ║\n"
-                    "║  │ /set_attack 3 - Attack 3 (DEFAULT)                   │  ║\n"
-                    "║  │ /set_attack 4 - Attack 4                             │  ║\n"
-                    "║  └────────────────────────────────────────────────────────┘  ║\n"
-                    "║                                                              ║\n"
-                    "╚══════════════════════════════════════════════════════════════╝"
-                )
+                # anything that is not a number is a move name, e.g. /set_attack Double-Edge
+                await self.set_attack_by_name(event, user_id, " ".join(parts))
                 return
             
             if attack_num < 1 or attack_num > 4:
-                await event.edit(
+                await self.edit_command(event, 
                     "╔══════════════════════════════════════════════════════════════╗\n"
                     "║                ❌ INVALID ATTACK NUMBER ❌                 ║\n"
                     "╠══════════════════════════════════════════════════════════════╣\n"
@@ -429,15 +662,10 @@ class BlisseyBot:
             row = (attack_num - 1) // 2
             col = (attack_num - 1) % 2
             
-            # Save user's attack preference
-            self.attack_config[str(user_id)] = {
-                'row': row,
-                'col': col,
-                'attack_name': f"Attack {attack_num}"
-            }
-            self.save_attack_config()
+            # Save user's attack preference (written to disk in the background)
+            self.attack_config.set(str(user_id), f"Attack {attack_num}", row=row, col=col)
             
-            await event.edit(
+            await self.edit_command(event, 
                 f"╔══════════════════════════════════════════════════════════════╗\n"
                 f"║                ✅ ATTACK SET SUCCESSFULLY ✅                ║\n"
                 f"╠══════════════════════════════════════════════════════════════╣\n"
@@ -458,160 +686,215 @@ class BlisseyBot:
         except Exception as e:
             logger.error(f"Error handling set_attack command: {e}")
     
+    async def set_attack_by_name(self, event, user_id, move):
+        """Pick the attack by move name, wherever it sits on the keyboard"""
+        self.attack_config.set(str(user_id), move, move=move)
+        known = sorted(self.keyboards.known_moves())
+        wanted = normalize_move(move)
+        note = ""
+        if known and not any(normalize_move(name).startswith(wanted) for name in known):
+            note = f"║  ⚠️ Not seen yet, keyboard had: {', '.join(known)}\n"
+        await self.edit_command(event,
+            f"╔══════════════════════════════════════════════════════════════╗\n"
+            f"║                ✅ ATTACK SET SUCCESSFULLY ✅                ║\n"
+            f"╠══════════════════════════════════════════════════════════════╣\n"
+            f"║                                                              ║\n"
+            f"║  🎯 SELECTED: {move}\n"
+            f"{note}"
+            f"║                                                              ║\n"
+            f"║  ⚔️ Bot will click {move} wherever it is on the keyboard!\n"
+            f"║                                                              ║\n"
+            f"╚══════════════════════════════════════════════════════════════╝"
+        )
+        logger.info(f"User {user_id} set attack to move: {move}")
     
-    def save_attack_config(self):
-        """Save attack configuration to file"""
+    
+    async def handle_stats_command(self, event, args=""):
+        """Handle /stats command"""
         try:
-            with open(self.attack_config_file, 'w') as f:
-                json.dump(self.attack_config, f, indent=2)
+            now = asyncio.get_running_loop().time()
+            lines = [f"📊 STATS - {self.name}", f"state: {self.target.battle.state.value} on {self.target.label}"]
+            if len(self.targets) > 1:
+                lines.extend(f"  {target.describe(now)}" for target in self.targets)
+            events_seen = ", ".join(f"{k} {v}" for k, v in sorted(self.events.items())) or "none"
+            lines.append(f"events: {events_seen}")
+            retries = ", ".join(f"{k} {v}" for k, v in sorted(self.retry.stats().items())) or "none"
+            lines.append(f"retries: {retries}")
+            history = self.history.summary()
+            lines.append(
+                f"battles: {history['battles']} ({history['battles_per_hour']:.1f}/h, "
+                f"{history['last_hour_battles']} in the last hour), "
+                f"forfeit rate {history['forfeit_rate']:.0%}, avg {history['avg_turns']:.1f} turns, "
+                f"{history['avg_duration']:.0f}s"
+            )
+            lines.append(
+                f"money: {history['money']} 💵 ({history['money_per_hour']:.0f}/h, "
+                f"{history['last_hour_money']} in the last hour), daily limits {history['daily_limits']}"
+            )
+            lines.append(f"daily limit: {self.daily.describe()}")
+            if self.target.last_state is not None:
+                lines.append(f"last turn: {self.target.last_state.describe()}")
+            lines.append(f"moves ({self.policy.name}): {self.move_damage.describe() or 'no damage seen yet'}")
+            lines.append(f"peer resolves skipped: {sum(t.peers.skipped_resolves for t in self.targets)}")
+            checks = Counter()
+            for target in self.targets:
+                checks.update(target.recent.stats())
+            checks = ", ".join(f"{k} {v}" for k, v in checks.items())
+            lines.append(f"battle status checks: {checks}")
+            lines.append(f"pacing: {self.pacing.describe()}")
+            keyboards = ", ".join(f"{k} {v}" for k, v in self.keyboards.stats().items())
+            lines.append(f"keyboards: {keyboards}")
+            updates = ", ".join(f"{k} {v}" for k, v in sorted(self.updates.stats().items())) or "none"
+            lines.append(f"updates dropped: {updates}")
+            commands = ", ".join(f"{k} {v}" for k, v in sorted(self.commands.stats().items())) or "none"
+            lines.append(f"commands: {commands}")
+            reconnects = ", ".join(f"{k} {v}" for k, v in sorted(self.connection.stats().items())) or "none"
+            lines.append(f"reconnects: {reconnects}")
+            limits = ", ".join(f"{k} {v}" for k, v in sorted(self.limiter.stats().items())) or "none"
+            lines.append(f"rate limiter: {limits}")
+            lines.append("")
+            lines.append(f"{'stage':<32}{'n':>6}{'p50':>8}{'p90':>8}{'p99':>8}  (ms)")
+            for name, count, p50, p90, p99 in self.metrics.summary():
+                lines.append(f"{name:<32}{count:>6}{p50:>8.1f}{p90:>8.1f}{p99:>8.1f}")
+            await self.edit_command(event, "```\n" + "\n".join(lines) + "\n```")
+            self.dump_metrics()
         except Exception as e:
-            logger.error(f"Error saving attack config: {e}")
+            logger.error(f"Error handling stats command: {e}")
+    
+    async def edit_command(self, event, text):
+        """Edit a self-command message through the shared rate limiter"""
+        await self.limiter.call('edit', event.edit, text)
+    
+    def pace_success(self, *names):
+        self.pacing.success(*names)
+        self.retry.policy.base_delay = self.pacing.retry.delay
+    
+    def pace_pushback(self, reason, *names):
+        self.pacing.pushback(reason, *names)
+        self.retry.policy.base_delay = self.pacing.retry.delay
+    
+    def pace_backoff(self, reason, *names):
+        self.pacing.backoff(reason, *names)
+        self.retry.policy.base_delay = self.pacing.retry.delay
     
-    async def click_battle_button(self, message, retry_count=0):
-        """Click the button at user's configured position with retry logic"""
+    def dump_metrics(self):
+        try:
+            self.metrics.write_prometheus(self.metrics_file)
+        except Exception as e:
+            logger.error(f"Error writing metrics file: {e}")
+    
+    async def save_state_periodically(self):
+        while True:
+            await asyncio.sleep(METRICS_DUMP_INTERVAL)
+            self.dump_metrics()
+            self.pacing.save()
+    
+    async def click_battle_button(self, target, message, trace=None, state=None):
+        """Click the attack button with retry logic
+        
+        The move policy picks the button from `state`, the parsed turn the
+        click answers; without one it is the user's configured attack.
+        """
+        trace = trace or self.metrics.trace()
+        trace.mark('slept')
         try:
             if not message.reply_markup:
                 logger.warning("⚠️ No reply markup found in message")
                 return
+            if state is not None and logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"🔍 Turn: {state.describe()}")
                 
-            # Get the inline keyboard
-            keyboard = message.reply_markup.rows
-            
-            # Get user's attack configuration (default to config values if no user config)
-            # For now, we'll use the default user ID, but this could be made dynamic
-            target_row, target_col = self.get_user_attack_config("default")
-            
-            # Debug: Print keyboard structure
-            logger.info(f"🔍 Keyboard has {len(keyboard)} rows")
-            logger.info(f"🎯 Target button: Row {target_row + 1}, Column {target_col + 1}")
-            for i, row in enumerate(keyboard):
-                logger.info(f"🔍 Row {i}: {len(row.buttons)} buttons")
-                for j, button in enumerate(row.buttons):
-                    marker = "🎯" if i == target_row and j == target_col else "  "
-                    logger.info(f"{marker} Button [{i}][{j}]: {button.text} (type: {type(button).__name__})")
-            
-            if len(keyboard) >= (target_row + 1) and len(keyboard[target_row].buttons) >= (target_col + 1):
-                # Click button at user's configured position
-                button = keyboard[target_row].buttons[target_col]
+            # The keyboard is indexed once per layout; later turns are a lookup
+            layout = self.keyboards.layout(message.reply_markup)
+            
+            # This account's attack configuration (default to config values if no user config)
+            move, target_row, target_col = self.get_user_attack_config(self.user_key)
+            button = layout.find(move, target_row, target_col)
+            if button is None and move:
+                # the move is not on this keyboard, use the account default position
+                logger.warning(f"⚠️ Move {move} not on keyboard ({', '.join(layout.names)}), using default attack")
+                button = layout.find(row=self.attack_row, col=self.attack_col)
+            # the move policy may pick another move for this turn
+            choice = self.policy.choose(state, layout.names, button.text if button else None)
+            if choice:
+                button = layout.find(choice) or button
+            if button is None:
+                logger.warning(f"⚠️ No callback button for the configured attack, keyboard has: {layout.describe() or 'nothing clickable'}")
+                return
+            
+            failures = 0
+            
+            async def attempt(tries):
+                nonlocal failures
+                logger.debug(f"🎯 Clicking button: {button.text} (attempt {tries + 1})")
+                trace.mark('click_sent')
+                try:
+                    request = GetBotCallbackAnswerRequest(
+                        peer=message.chat_id,
+                        msg_id=message.id,
+                        data=button.data
+                    )
+                    result = await self.limiter.call(
+                        'click',
+                        lambda: asyncio.wait_for(self.client(request), timeout=BUTTON_TIMEOUT)
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(f"⏰ Button click timed out after {BUTTON_TIMEOUT} seconds")
+                    trace.mark('timed_out')
+                    self.pace_pushback("click timeout", 'retry')
+                    raise RetryableError('timeout')
+                except Exception as e:
+                    # one more try for unknown errors, then give up
+                    failures += 1
+                    if failures > 1:
+                        logger.error(f"❌ Button click failed again: {e}")
+                        logger.error("💡 The button might not be clickable or the bot might not support callbacks")
+                        logger.error("💡 Try checking if the bot is online and the message is recent")
+                        return None
+                    logger.warning(f"⚠️ Button click failed: {e}")
+                    raise RetryableError('error', str(e))
                 
-                if isinstance(button, KeyboardButtonCallback):
-                    logger.info(f"🎯 Clicking button: {button.text} (attempt {retry_count + 1})")
-                    
-                    # Try to click the button with timeout
-                    try:
-                        # Method 1: Use the proper callback query method with correct import
-                        from telethon.tl.functions.messages import GetBotCallbackAnswerRequest
-                        
-                        result = await asyncio.wait_for(
-                            self.client(GetBotCallbackAnswerRequest(
-                                peer=message.chat_id,
-                                msg_id=message.id,
-                                data=button.data
-                            )),
-                            timeout=BUTTON_TIMEOUT
-                        )
-                        logger.info("✅ Button clicked successfully!")
-                        logger.info(f"🔍 Callback result: {result}")
-                        
-                        # Check if bot says "too many requests" or "please try again"
-                        if hasattr(result, 'message') and result.message:
-                            if "too many requests" in result.message.lower():
-                                logger.warning("⚠️ Bot says: 'Receiving too many requests'")
-                                logger.info("🔄 Retrying in 3 seconds... (unlimited retries)")
-                                await asyncio.sleep(3)
-                                await self.click_battle_button(message, retry_count + 1)
-                                return
-                            elif "please try again" in result.message.lower():
-                                logger.warning("⚠️ Bot says: 'Please try again'")
-                                logger.info("🔄 Retrying in 3 seconds... (unlimited retries)")
-                                await asyncio.sleep(3)
-                                await self.click_battle_button(message, retry_count + 1)
-                                return
-                        
-                        # Wait for smooth experience
-                        await asyncio.sleep(SMOOTH_DELAY)
-                        
-                    except asyncio.TimeoutError:
-                        logger.warning(f"⏰ Button click timed out after {BUTTON_TIMEOUT} seconds")
-                        logger.info(f"🔄 Retrying button click in {BUTTON_RETRY_DELAY} seconds... (unlimited retries)")
-                        await asyncio.sleep(BUTTON_RETRY_DELAY)
-                        await self.click_battle_button(message, retry_count + 1)
-                    except Exception as e:
-                        logger.warning(f"⚠️ Method 1 failed: {e}")
-                        try:
-                            # Method 2: Try using the button's callback directly with proper parameters
-                            from telethon.tl.functions.messages import GetBotCallbackAnswerRequest
-                            
-                            # Try with different parameters
-                            result = await asyncio.wait_for(
-                                self.client(GetBotCallbackAnswerRequest(
-                                    peer=message.chat_id,
-                                    msg_id=message.id,
-                                    data=button.data,
-                                    game=False
-                                )),
-                                timeout=BUTTON_TIMEOUT
-                            )
-                            logger.info("✅ Button clicked successfully (Method 2)!")
-                            logger.info(f"🔍 Callback result: {result}")
-                            
-                            # Check if bot says "too many requests" or "please try again"
-                            if hasattr(result, 'message') and result.message:
-                                if "too many requests" in result.message.lower():
-                                    logger.warning("⚠️ Bot says: 'Receiving too many requests'")
-                                    logger.info("🔄 Retrying in 3 seconds... (unlimited retries)")
-                                    await asyncio.sleep(3)
-                                    await self.click_battle_button(message, retry_count + 1)
-                                    return
-                                elif "please try again" in result.message.lower():
-                                    logger.warning("⚠️ Bot says: 'Please try again'")
-                                    logger.info("🔄 Retrying in 3 seconds... (unlimited retries)")
-                                    await asyncio.sleep(3)
-                                    await self.click_battle_button(message, retry_count + 1)
-                                    return
-                            
-                            # Wait for smooth experience
-                            await asyncio.sleep(SMOOTH_DELAY)
-                            
-                        except asyncio.TimeoutError:
-                            logger.warning(f"⏰ Button click timed out after {BUTTON_TIMEOUT} seconds")
-                            logger.info(f"🔄 Retrying button click in {BUTTON_RETRY_DELAY} seconds... (unlimited retries)")
-                            await asyncio.sleep(BUTTON_RETRY_DELAY)
-                            await self.click_battle_button(message, retry_count + 1)
-                        except Exception as e2:
-                            logger.error(f"❌ All methods failed: {e2}")
-                            logger.error("💡 The button might not be clickable or the bot might not support callbacks")
-                            logger.error("💡 Try checking if the bot is online and the message is recent")
-                else:
-                    logger.warning("⚠️ Button is not a callback button")
-            else:
-                logger.warning(f"⚠️ Button layout not found (need at least {target_row + 1} rows, {target_col + 1} columns in row {target_row})")
-                logger.warning(f"⚠️ Available: {len(keyboard)} rows, {len(keyboard[target_row].buttons) if len(keyboard) > target_row else 0} buttons in target row")
+                self.metrics.answered(trace)
+                # the server answered, so retries need not wait as long
+                self.pace_success('retry')
+                logger.debug("✅ Button clicked successfully!")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"🔍 Callback result: {result}")
+                
+                # Check if bot says "too many requests" or "please try again"
+                if hasattr(result, 'message') and result.message:
+                    answer = result.message.lower()
+                    if "too many requests" in answer:
+                        logger.warning("⚠️ Bot says: 'Receiving too many requests'")
+                        self.pace_pushback("too many requests", 'smooth')
+                        raise RetryableError('too_many_requests')
+                    elif "please try again" in answer:
+                        logger.warning("⚠️ Bot says: 'Please try again'")
+                        self.pace_pushback("please try again", 'smooth')
+                        raise RetryableError('please_try_again')
+                self.pace_success('smooth')
+                return result
+            
+            await self.retry.run(attempt, deadline=target.battle_deadline)
                 
         except Exception as e:
             logger.error(f"❌ Error clicking button: {e}")
     
-    async def check_battle_status(self):
-        """Check if a battle is currently running by looking at recent messages"""
+    async def check_battle_status(self, target):
+        """Check if a battle is currently running on `target`, from its recent messages buffer
+        
+        The network is only asked after a gap in the update stream.
+        """
         try:
-            # Get the target channel entity
-            channel = await self.client.get_entity(self.target_channel)
+            now = asyncio.get_running_loop().time()
+            if target.recent.needs_backfill:
+                await self.backfill_recent_messages(target, now)
+            else:
+                target.recent.memory_checks += 1
             
-            # Get recent messages from the bot
-            async for message in self.client.iter_messages(channel, limit=10):
-                if message.sender and hasattr(message.sender, 'username') and message.sender.username == self.bot_username:
-                    text = message.text or ""
-                    
-                    # Check for battle indicators
-                    if any(pattern.lower() in text.lower() for pattern in [
-                        BATTLE_START_PATTERN,
-                        "battle",
-                        "opponent",
-                        "blissey",
-                        "pokemon"
-                    ]):
-                        logger.info("🔍 Found recent battle activity")
-                        return True
+            if target.recent.battle_active(now):
+                logger.info("🔍 Found recent battle activity")
+                return True
             
             logger.info("🔍 No recent battle activity found")
             return False
@@ -619,69 +902,155 @@ class BlisseyBot:
         except Exception as e:
             logger.error(f"❌ Error checking battle status: {e}")
             return False
+    
+    async def backfill_recent_messages(self, target, now):
+        """Fill the recent messages buffer of `target` from the channel history"""
+        channel = await target.peers.get_channel()
+        fetched = []
+        async for message in self.client.iter_messages(channel, limit=RECENT_MESSAGES_SIZE):
+            if message.sender_id == target.peers.bot_id:
+                kind = classify(message.text or "")
+                fetched.append((now - message_age(message), message.id, kind))
+                if kind in CLICK_KINDS and message.reply_markup and target.last_turn_message is None:
+                    # newest battle turn: index its keyboard before the first click needs it
+                    target.last_turn_message = message
+                    self.keyboards.layout(message.reply_markup)
+        fetched.reverse()
+        target.recent.backfilled(fetched)
+        if fetched:
+            # history from before this run counts as seen, a catch-up never replays it
+            target.last_seen_id = max(target.last_seen_id, fetched[-1][1])
+        logger.info(f"🔍 Recent messages backfilled from the network ({len(fetched)} bot messages)")
+
+    def mark_gap(self):
+        for target in self.targets:
+            target.recent.mark_gap()
+    
+    async def catch_up(self, lost_at):
+        """Replay HeXamonbot updates missed while disconnected, oldest first
+        
+        New messages after the last one seen and edits to messages seen before the
+        drop are fed to process_message, so the battle state machines catch up.
+        A click or challenge that failed during the outage is sent again.
+        """
+        replayed = 0
+        for targets in self.targets_by_chat.values():
+            replayed += await self.catch_up_channel(targets, lost_at)
+        now = asyncio.get_running_loop().time()
+        logger.info(f"🔁 Replayed {replayed} missed updates after {now - lost_at:.1f}s offline")
+        
+        if self.automation_running and all(target.battle.pending is None for target in self.targets):
+            # nothing is scheduled, so whatever was in flight died with the connection
+            await self.run_automation()
+    
+    async def catch_up_channel(self, targets, lost_at):
+        """Replay one channel's missed updates; `targets` are the posts farmed in it"""
+        channel = await targets[0].peers.get_channel()
+        handled_ids = {msg_id for target in targets for msg_id in target.handled_ids}
+        last_seen_id = max(target.last_seen_id for target in targets)
+        bot_messages = []
+        async for message in self.client.iter_messages(channel, limit=RECENT_MESSAGES_SIZE):
+            if message.sender_id == targets[0].peers.bot_id:
+                bot_messages.append(message)
+        bot_messages.reverse()
+        now = asyncio.get_running_loop().time()
+        
+        replayed = 0
+        for message in bot_messages:
+            # handled IDs can only come back as edits; backfilled ones never went
+            # through process_message, so they are history, not missed updates
+            if message.id not in handled_ids:
+                if message.id <= last_seen_id:
+                    # older than anything handled this run, not ours to act on
+                    continue
+                if not last_seen_id and now - message_age(message) < lost_at:
+                    # nothing handled yet, so only what was posted after the drop is new
+                    continue
+            if self.updates.is_repeat(message):
+                continue
+            replayed += 1
+            await self.process_message(SimpleNamespace(message=message))
+        # the buffers match the channel again, no extra backfill needed
+        fetched = [(now - message_age(message), message.id, classify(message.text or "")) for message in bot_messages]
+        for target in targets:
+            target.recent.backfilled(fetched)
+        return replayed
 
-    async def battle_timeout_handler(self):
+    async def battle_timeout_handler(self, target):
         """Handle battle timeout - resend challenge if no battle starts"""
         try:
-            await asyncio.sleep(BATTLE_TIMEOUT)
-            if not self.current_battle and self.challenge_sent_time:
+            if target.battle.state is BattleState.CHALLENGE_SENT:
                 logger.warning(f"⏰ No battle started after {BATTLE_TIMEOUT} seconds, resending challenge...")
-                await self.send_challenge_command()
-        except asyncio.CancelledError:
-            logger.info("🔄 Battle timeout cancelled - battle started!")
+                await self.send_challenge_command(target)
         except Exception as e:
             logger.error(f"❌ Error in battle timeout handler: {e}")
 
-    async def send_challenge_command(self):
+    async def send_challenge_command(self, target=None):
         """Send the /challenge command to the target message"""
+        target = target or self.target
+        self.target = target
         try:
-            # Get the target channel entity
-            channel = await self.client.get_entity(self.target_channel)
-            
-            # Send the challenge command as a reply to the target message
-            await self.client.send_message(
-                channel,
-                CHALLENGE_COMMAND,
-                reply_to=self.target_message_id
-            )
-            logger.info("🎯 Challenge command sent!")
+            # nothing goes out while parked on the daily limit (also after a restart)
+            parked = self.daily.remaining()
+            if parked > 0:
+                self.park_until_reset(parked, target)
+                return
             
-            # Set challenge sent time and start timeout
-            self.challenge_sent_time = asyncio.get_event_loop().time()
-            self.current_battle = False
+            channel = await target.peers.get_channel()
             
-            # Start battle timeout task
-            if self.battle_timeout_task:
-                self.battle_timeout_task.cancel()
-            self.battle_timeout_task = asyncio.create_task(self.battle_timeout_handler())
+            # Send the challenge command as a reply to the target message,
+            # queued behind the rate limiter which sleeps out flood waits
+            try:
+                sent = await self.limiter.call(
+                    'challenge',
+                    self.client.send_message,
+                    channel,
+                    CHALLENGE_COMMAND,
+                    reply_to=target.message_id,
+                    before_retry=lambda: self.challenge_still_needed(target)
+                )
+            except PEER_INVALID_ERRORS as e:
+                logger.warning(f"🔗 Cached channel peer is stale ({e}), resolving again...")
+                await target.peers.refresh()
+                sent = await self.limiter.call(
+                    'challenge',
+                    self.client.send_message,
+                    target.peers.channel,
+                    CHALLENGE_COMMAND,
+                    reply_to=target.message_id,
+                    before_retry=lambda: self.challenge_still_needed(target)
+                )
+            if sent is None:
+                # dropped after a flood wait; try again later unless a battle shows up
+                if target.battle.state is not BattleState.IN_BATTLE:
+                    target.battle.schedule(BATTLE_TIMEOUT, lambda: self.send_challenge_command(target), "challenge")
+                return
+            logger.info(f"🎯 Challenge command sent to {target.label}! "
+                        f"({target.peers.skipped_resolves} peer resolves skipped so far)")
             
-            # Wait for smooth experience
-            await asyncio.sleep(SMOOTH_DELAY)
+            # Resend if no battle starts in time
+            target.battle.transition(BattleState.CHALLENGE_SENT, "challenge sent")
+            target.awaiting_battle = True
+            target.last_challenge_id = sent.id
+            target.battle.schedule(BATTLE_TIMEOUT, lambda: self.battle_timeout_handler(target), "battle timeout")
             
         except Exception as e:
-            error_msg = str(e).lower()
-            if "too many commands" in error_msg or "flood" in error_msg:
-                logger.warning("⚠️ Too many commands error detected!")
-                logger.info("🔍 Checking if battle is already running...")
-                
-                # Check if we're already in a battle
-                if self.current_battle:
-                    logger.info("⚔️ Battle is already running, waiting...")
-                    # Wait a bit before trying again
-                    await asyncio.sleep(5)
-                else:
-                    # Check recent messages for battle activity
-                    battle_running = await self.check_battle_status()
-                    if battle_running:
-                        logger.info("⚔️ Battle is running (detected in messages), waiting...")
-                        await asyncio.sleep(10)
-                    else:
-                        logger.info("🆕 No battle running, sending new challenge...")
-                        # Wait a bit and try again
-                        await asyncio.sleep(3)
-                        await self.send_challenge_command()
-            else:
-                logger.error(f"❌ Error sending challenge command: {e}")
+            logger.error(f"❌ Error sending challenge command: {e}")
+    
+    async def challenge_still_needed(self, target):
+        """After a flood wait, only resend the challenge if no battle started meanwhile"""
+        logger.info("🔍 Checking if battle is already running...")
+        if target.battle.state is BattleState.IN_BATTLE:
+            logger.info("⚔️ Battle is already running, dropping challenge")
+            return False
+        if await self.check_battle_status(target):
+            logger.info("⚔️ Battle is running (detected in messages), dropping challenge")
+            return False
+        logger.info("🆕 No battle running, sending new challenge...")
+        return True
+    
+    def on_flood_wait(self, kind, seconds):
+        self.pace_backoff(f"flood wait {seconds}s on {kind}", 'smooth', 'restart', 'retry')
     
     async def start_automation(self):
         """Start the main automation loop"""
@@ -691,12 +1060,12 @@ class BlisseyBot:
         logger.info("  /pause - stop automation") 
         logger.info("  /custom - configure attack")
         logger.info("  /guide - show help")
+        logger.info("  /stats - show latency stats")
         self.is_running = True
         
-        # Keep the bot running but don't start automation automatically
+        # Keep the bot running until request_stop(); commands drive the automation
         try:
-            while self.is_running:
-                await asyncio.sleep(1)
+            await self.stopped.wait()
         except KeyboardInterrupt:
             logger.info("bot stopped by user")
         except Exception as e:
@@ -704,9 +1073,23 @@ class BlisseyBot:
         finally:
             await self.stop()
     
+    def request_stop(self):
+        """Make start_automation return and shut the bot down"""
+        self.is_running = False
+        self.stopped.set()
+    
     async def stop(self):
         """Stop the bot"""
         self.is_running = False
+        if self.connection_task:
+            # a deliberate disconnect must not be taken for a dropped connection
+            self.connection_task.cancel()
+        if self.metrics_task:
+            self.metrics_task.cancel()
+            self.dump_metrics()
+        self.pacing.save()
+        await self.attack_config.close()
+        self.history.close()
         await self.client.disconnect()
         logger.info("bot disconnected")
 
@@ -722,8 +1105,22 @@ async def main():
         logger.info("3. run: python main.py")
         return
     
+    # run every account from one process when an accounts file is present
+    if os.path.exists(ACCOUNTS_FILE):
+        from runner import MultiAccountRunner, load_accounts
+        from supervisor import Supervisor, worker_count
+        accounts = load_accounts(ACCOUNTS_FILE)
+        # large fleets are sharded across worker processes
+        if worker_count(accounts) > 1:
+            await Supervisor(accounts).run()
+        else:
+            await MultiAccountRunner(accounts).run()
+        return
+    
     # create and start bot
-    bot = BlisseyBot(API_ID, API_HASH)
+    session_string = SESSION_STRING if SESSION_STRING != "YOUR_SESSION_STRING_HERE" else None
+    session = open_session('blissey', 'blissey_session.session', session_string)
+    bot = BlisseyBot(API_ID, API_HASH, session_file=session)
     await bot.start()
 
 if __name__ == "__main__":
@@ -0,0 +1,126 @@
+import bisect
+import time
+from atomic_file import atomic_write
+
+# bucket upper bounds in seconds, roughly log spaced from 100us to 60s
+BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float('inf'),
+)
+
+# hot-path stages in the order a battle turn goes through them
+STAGES = ('received', 'coalesced', 'classified', 'slept', 'click_sent', 'answered', 'next_message')
+
+
+class Histogram:
+    """Fixed-bucket histogram, cheap enough to update on every message"""
+
+    __slots__ = ('counts', 'count', 'total')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the given percentile"""
+        if not self.count:
+            return 0.0
+        rank = pct / 100 * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return BUCKETS[-1]
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class Trace:
+    """Timestamps one update as it moves through the stages"""
+
+    __slots__ = ('metrics', 'stage', 'at', 'started')
+
+    def __init__(self, metrics, stage='received'):
+        self.metrics = metrics
+        self.stage = stage
+        self.at = self.started = metrics.clock()
+
+    def mark(self, stage):
+        now = self.metrics.clock()
+        self.metrics.observe(f"{self.stage}_to_{stage}", now - self.at)
+        self.stage = stage
+        self.at = now
+
+
+class StageMetrics:
+    """Per-stage latency histograms for one account"""
+
+    def __init__(self, account='blissey', clock=time.perf_counter):
+        self.account = account
+        # swappable so simulated runs can report virtual time
+        self.clock = clock
+        self.histograms = {}
+        self.last_answer = None
+
+    def observe(self, name, seconds):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+    def trace(self):
+        return Trace(self)
+
+    def answered(self, trace):
+        trace.mark('answered')
+        self.observe('received_to_answered', trace.at - trace.started)
+        self.last_answer = trace.at
+
+    def message_seen(self):
+        """Close the answered -> next battle message gap, if one is open"""
+        if self.last_answer is not None:
+            self.observe('answered_to_next_message', self.clock() - self.last_answer)
+            self.last_answer = None
+
+    def summary(self):
+        """Rows of (stage, count, p50, p90, p99) in milliseconds"""
+        rows = []
+        for name in sorted(self.histograms, key=self._order):
+            h = self.histograms[name]
+            rows.append((name, h.count, h.percentile(50) * 1000, h.percentile(90) * 1000, h.percentile(99) * 1000))
+        return rows
+
+    @staticmethod
+    def _order(name):
+        first = name.split('_to_')[0]
+        return (STAGES.index(first) if first in STAGES else len(STAGES), name)
+
+    def prometheus(self):
+        lines = [
+            "# HELP blissey_stage_seconds Time between hot-path stages of a battle turn",
+            "# TYPE blissey_stage_seconds histogram",
+        ]
+        for name in sorted(self.histograms, key=self._order):
+            h = self.histograms[name]
+            labels = f'account="{self.account}",stage="{name}"'
+            cumulative = 0
+            for bound, count in zip(BUCKETS, h.counts):
+                cumulative += count
+                le = "+Inf" if bound == float('inf') else repr(bound)
+                lines.append(f'blissey_stage_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"blissey_stage_seconds_sum{{{labels}}} {h.total}")
+            lines.append(f"blissey_stage_seconds_count{{{labels}}} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Atomically write the Prometheus text format to `path`"""
+        atomic_write(path, self.prometheus())
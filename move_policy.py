@@ -0,0 +1,176 @@
+import logging
+import random
+from collections import deque
+from classifier import EventKind
+from battle_message import BattleMessage
+from keyboard_index import normalize_move
+from config import *
+
+logger = logging.getLogger(__name__)
+
+
+class MoveDamage:
+    """Damage each of our moves did to Blissey, learned from consecutive parsed turns
+
+    Only the newest `size` hits per move are kept. Knockout turns are left
+    out: they only show that the move did at least the HP that was left.
+    """
+
+    def __init__(self, size=MOVE_DAMAGE_SAMPLES):
+        self.size = size
+        self.samples = {}
+        self.names = {}
+
+    def key(self, move):
+        """The samples key for a move name or a button label such as "Close Combat (5/5)" """
+        key = normalize_move(move)
+        if key in self.samples:
+            return key
+        return next((known for known in self.samples if key.startswith(known)), key)
+
+    def add(self, move, damage):
+        key = normalize_move(move)
+        samples = self.samples.get(key)
+        if samples is None:
+            samples = self.samples[key] = deque(maxlen=self.size)
+            self.names[key] = move
+        samples.append(damage)
+
+    def load(self, rows):
+        """Seed from (move, damage) rows, oldest first"""
+        for move, damage in rows:
+            self.add(move, damage)
+
+    def observe(self, before, after):
+        """Record the damage our move in `after` did since `before`; None if the turns do not show it"""
+        if before is None or after.kind is not EventKind.BLISSEY_MOVE or not after.own_move:
+            return None
+        if before.opponent_hp is None or after.opponent_hp is None:
+            return None
+        damage = before.opponent_hp - after.opponent_hp
+        if damage < 0:
+            # Blissey healed in between, the hit cannot be told apart
+            return None
+        self.add(after.own_move, damage)
+        return damage
+
+    def count(self, move):
+        return len(self.samples.get(self.key(move), ()))
+
+    def mean(self, move):
+        samples = self.samples.get(self.key(move))
+        return sum(samples) / len(samples) if samples else 0.0
+
+    def chance(self, move, hp):
+        """How often a hit of this move would have taken `hp` or more"""
+        samples = self.samples.get(self.key(move))
+        return sum(1 for damage in samples if damage >= hp) / len(samples) if samples else 0.0
+
+    def describe(self):
+        return ", ".join(f"{self.names[key]} {sum(s) / len(s):.0f} avg ({len(s)})"
+                         for key, s in sorted(self.samples.items(), key=lambda item: -sum(item[1]) / len(item[1])))
+
+
+class ConfiguredPolicy:
+    """The configured move every turn, as before there were policies"""
+
+    name = "configured"
+
+    def __init__(self, damage):
+        self.damage = damage
+
+    def choose(self, state, moves, configured=None):
+        return None
+
+
+class RuleBasedPolicy:
+    """Picks the move from the parsed turn and the damage moves did before
+
+    In order: without a parsed turn the configured move is used; ignored
+    buttons are never pressed; a damaging move with fewer than `tries` hits
+    recorded is tried, the configured one first; then the move whose past
+    hits would most often knock Blissey out from its current HP wins, and
+    when none would, the one with the highest average damage.
+    """
+
+    name = "rules"
+
+    def __init__(self, damage, ignored=POLICY_IGNORED_BUTTONS, tries=MOVE_TRIES):
+        self.damage = damage
+        self.ignored = {normalize_move(button) for button in ignored}
+        self.tries = tries
+
+    def choose(self, state, moves, configured=None):
+        if state is None or state.opponent_hp is None:
+            return None
+        candidates = [move for move in moves if normalize_move(move) not in self.ignored]
+        if not candidates:
+            return None
+        if configured in candidates:
+            candidates.remove(configured)
+            candidates.insert(0, configured)
+        for move in candidates:
+            if self.damage.count(move) < self.tries:
+                return move
+        hp = state.opponent_hp
+        # max() keeps the first of equals, so the configured move wins ties
+        return max(candidates, key=lambda move: (self.damage.chance(move, hp), self.damage.mean(move)))
+
+
+# policies by MOVE_POLICY name; a new policy only needs choose(state, moves, configured)
+POLICIES = {
+    ConfiguredPolicy.name: ConfiguredPolicy,
+    RuleBasedPolicy.name: RuleBasedPolicy,
+}
+
+
+def make_policy(name=MOVE_POLICY, damage=None):
+    """The policy called `name`, learning into `damage`"""
+    policy = POLICIES.get(name)
+    if policy is None:
+        logger.warning(f"⚠️ Unknown move policy {name!r}, using the configured move")
+        policy = ConfiguredPolicy
+    return policy(damage if damage is not None else MoveDamage())
+
+
+def evaluate_policy(policy, recorded, moves, configured, battles=1000, max_hp=None, max_turns=50, seed=1):
+    """Replay battles against recorded damage to see how many turns a policy would take
+
+    `recorded` is (move, damage) rows such as BattleHistory.recorded_turns()
+    returns; each hit is drawn from the recorded hits of the chosen move. The
+    policy learns as it goes, as it would live, so trying moves out is counted.
+    A move with no recorded hits cannot be replayed and the configured move's
+    hits stand in; those turns are counted as `unknown`.
+    """
+    rng = random.Random(seed)
+    hits = {}
+    for move, damage in recorded:
+        hits.setdefault(normalize_move(move), []).append(damage)
+    fallback = hits.get(normalize_move(configured), [0])
+    max_hp = max_hp or BLISSEY_MAX_HP
+    turns = []
+    unknown = 0
+    for _ in range(battles):
+        hp = max_hp
+        turn = 0
+        while hp > 0 and turn < max_turns:
+            turn += 1
+            state = BattleMessage(EventKind.BLISSEY_MOVE, opponent_hp=hp, opponent_max_hp=max_hp)
+            move = policy.choose(state, moves, configured) or configured
+            options = hits.get(normalize_move(move))
+            if options is None:
+                unknown += 1
+                options = fallback
+            damage = min(rng.choice(options), hp)
+            hp -= damage
+            if hp > 0:
+                policy.damage.add(move, damage)
+        turns.append(turn)
+    turns.sort()
+    return {
+        'battles': battles,
+        'avg_turns': sum(turns) / battles,
+        'p90_turns': turns[int(0.9 * (battles - 1))],
+        'stalled': sum(1 for turn in turns if turn >= max_turns),
+        'unknown': unknown,
+    }
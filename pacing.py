@@ -0,0 +1,120 @@
+import json
+import logging
+import os
+from atomic_file import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+
+class PacingController:
+    """One learned delay, lowered step by step while calls keep succeeding
+
+    The delay only comes down after `patience` successes in a row, and the
+    delay it came down from is kept as `verified`. A pushback within `probe`
+    calls of a change or of the previous pushback means the lower delay is
+    too fast: the delay goes back to `verified` and the streak needed for the
+    next try doubles, so a server limit is probed less and less often. Other
+    pushbacks only restart the streak, since servers also push back at random.
+    backoff() is for hard signals such as a flood wait and grows the delay
+    multiplicatively, past the verified one.
+    """
+
+    def __init__(self, name, initial, floor, ceiling, step, backoff, streak=1, probe=3):
+        self.name = name
+        self.floor = floor
+        self.ceiling = ceiling
+        self.step = step
+        self.backoff_factor = backoff
+        self.streak = streak
+        self.probe = probe
+        self.delay = min(ceiling, max(floor, initial))
+        self.verified = self.delay
+        self.patience = streak
+        self.run = 0
+        self.successes = 0
+        self.pushbacks = 0
+
+    def success(self):
+        self.successes += 1
+        self.run += 1
+        if self.run >= self.patience and self.delay > self.floor:
+            self.run = 0
+            self.verified = self.delay
+            self.delay = max(self.floor, self.delay - self.step)
+
+    def pushback(self, reason):
+        self.pushbacks += 1
+        if self.delay < self.verified and self.run < self.probe:
+            old_delay = self.delay
+            self.delay = self.verified
+            self.patience = min(self.patience * 2, self.streak * 64)
+            logger.info(f"🐢 {self.name} delay {old_delay:.2f}s -> {self.delay:.2f}s ({reason})")
+        self.run = 0
+
+    def backoff(self, reason):
+        self.pushbacks += 1
+        old_delay = self.delay
+        # delay + step keeps growth going even from a floor of zero
+        self.delay = min(self.ceiling, max(self.delay * self.backoff_factor, self.delay + self.step))
+        self.verified = self.delay
+        self.patience = self.streak
+        self.run = 0
+        logger.info(f"🐢 {self.name} delay {old_delay:.2f}s -> {self.delay:.2f}s ({reason})")
+
+
+class Pacing:
+    """The adaptive delays of one account, persisted across restarts"""
+
+    def __init__(self, path, controllers):
+        self.path = path
+        self.controllers = {controller.name: controller for controller in controllers}
+        self.dirty = False
+        self.load()
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['controllers'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def success(self, *names):
+        for name in names:
+            self.controllers[name].success()
+        self.dirty = True
+
+    def pushback(self, reason, *names):
+        for name in names:
+            self.controllers[name].pushback(reason)
+        self.dirty = True
+
+    def backoff(self, reason, *names):
+        for name in names:
+            self.controllers[name].backoff(reason)
+        self.dirty = True
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    learned = json.load(f)
+                for name, delay in learned.items():
+                    controller = self.controllers.get(name)
+                    if controller:
+                        controller.delay = min(controller.ceiling, max(controller.floor, float(delay)))
+                        controller.verified = controller.delay
+                logger.info(f"🐢 Learned delays loaded: {self.describe()}")
+        except Exception as e:
+            logger.error(f"error loading pacing state: {e}")
+
+    def save(self):
+        """Atomically persist the learned delays if they changed"""
+        if not self.dirty:
+            return
+        try:
+            atomic_write_json(self.path, {name: c.delay for name, c in self.controllers.items()})
+            self.dirty = False
+        except Exception as e:
+            logger.error(f"Error saving pacing state: {e}")
+
+    def describe(self):
+        return ", ".join(f"{name} {c.delay:.2f}s" for name, c in self.controllers.items())
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import logging
+import os
+from telethon import utils
+from telethon.tl.types import InputPeerChannel, InputPeerUser
+from telethon.errors import ChannelInvalidError, ChannelPrivateError, PeerIdInvalidError
+from atomic_file import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+# errors that mean a cached peer went stale and has to be resolved again
+PEER_INVALID_ERRORS = (ChannelInvalidError, ChannelPrivateError, PeerIdInvalidError)
+
+
+class PeerCache:
+    """Resolves the target channel and HeXamonbot once and hands out InputPeers
+
+    With a `path`, the resolved IDs and access hashes are saved so the next
+    start can skip resolving altogether.
+    """
+
+    def __init__(self, client, channel, bot_username, path=None):
+        self.client = client
+        self.path = path
+        self.channel_ref = channel
+        self.bot_ref = bot_username
+        self.channel_entity = None
+        self.bot_entity = None
+        self.channel = None
+        self.bot = None
+        self.bot_id = None
+        self.channel_title = None
+        self.resolves = 0
+        self.skipped_resolves = 0
+
+    async def resolve(self):
+        """Resolve both peers over the network, concurrently"""
+        self.channel_entity, self.bot_entity = await asyncio.gather(
+            self.client.get_entity(self.channel_ref),
+            self.client.get_entity(self.bot_ref)
+        )
+        self.channel = utils.get_input_peer(self.channel_entity)
+        self.bot = utils.get_input_peer(self.bot_entity)
+        self.bot_id = self.bot_entity.id
+        self.channel_title = self.channel_entity.title
+        self.resolves += 1
+        logger.info(f"🔗 Peers resolved (resolve #{self.resolves})")
+        self.save()
+
+    def load(self):
+        """Use the peers saved by an earlier run; True if there were any"""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+            if saved.get('channel_ref') != self.channel_ref or saved.get('bot_ref') != self.bot_ref:
+                return False
+            self.channel = InputPeerChannel(saved['channel_id'], saved['channel_hash'])
+            self.bot = InputPeerUser(saved['bot_id'], saved['bot_hash'])
+            self.bot_id = saved['bot_id']
+            self.channel_title = saved.get('channel_title')
+            logger.info("🔗 Peers loaded from cache, no resolve needed")
+            return True
+        except Exception as e:
+            logger.error(f"error loading peer cache: {e}")
+            return False
+
+    def save(self):
+        # only channels and users come with an access hash worth keeping
+        if not self.path or not isinstance(self.channel, InputPeerChannel) or not isinstance(self.bot, InputPeerUser):
+            return
+        try:
+            atomic_write_json(self.path, {
+                'channel_ref': self.channel_ref,
+                'bot_ref': self.bot_ref,
+                'channel_id': self.channel.channel_id,
+                'channel_hash': self.channel.access_hash,
+                'channel_title': self.channel_title,
+                'bot_id': self.bot.user_id,
+                'bot_hash': self.bot.access_hash,
+            })
+        except Exception as e:
+            logger.error(f"Error saving peer cache: {e}")
+
+    def invalidate(self):
+        """Drop cached peers so the next lookup resolves them again"""
+        self.channel = None
+        self.bot = None
+
+    async def refresh(self):
+        self.invalidate()
+        await self.resolve()
+
+    async def get_channel(self):
+        if self.channel is None:
+            await self.resolve()
+        else:
+            self.skipped_resolves += 1
+        return self.channel
+
+    async def get_bot(self):
+        if self.bot is None:
+            await self.resolve()
+        else:
+            self.skipped_resolves += 1
+        return self.bot
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+from collections import Counter
+from telethon.errors import FloodWaitError, FloodPremiumWaitError, SlowModeWaitError
+
+logger = logging.getLogger(__name__)
+
+# errors that carry the exact number of seconds Telegram wants us to wait
+WAIT_ERRORS = (FloodWaitError, FloodPremiumWaitError, SlowModeWaitError)
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = None
+
+    def wait_time(self, now):
+        """Seconds until a token is available, refilling up to `now` first"""
+        if self.updated is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class RateLimiter:
+    """One outbound queue per method type, shared by every code path of an account
+
+    Calls wait for a token instead of failing, and a flood wait from Telegram
+    blocks that method type for exactly the seconds the server asked for.
+    """
+
+    def __init__(self, limits, on_flood=None):
+        self.buckets = {kind: TokenBucket(rate, capacity) for kind, (rate, capacity) in limits.items()}
+        self.locks = {kind: asyncio.Lock() for kind in limits}
+        self.blocked_until = dict.fromkeys(limits, 0.0)
+        self.on_flood = on_flood
+        self.counters = Counter()
+
+    async def acquire(self, kind):
+        loop = asyncio.get_running_loop()
+        bucket = self.buckets[kind]
+        # the lock keeps callers in FIFO order while they wait their turn
+        async with self.locks[kind]:
+            while True:
+                now = loop.time()
+                wait = max(self.blocked_until[kind] - now, bucket.wait_time(now))
+                if wait <= 0:
+                    bucket.take()
+                    return
+                self.counters[f"{kind}_queued"] += 1
+                await asyncio.sleep(wait)
+
+    def flood(self, kind, seconds):
+        loop = asyncio.get_running_loop()
+        self.blocked_until[kind] = max(self.blocked_until[kind], loop.time() + seconds)
+        self.counters[f"{kind}_flood_waits"] += 1
+        self.counters[f"{kind}_flood_seconds"] += seconds
+        logger.warning(f"🌊 Flood wait on {kind}: holding {kind} calls for {seconds}s")
+        if self.on_flood:
+            self.on_flood(kind, seconds)
+
+    async def call(self, kind, function, *args, before_retry=None, **kwargs):
+        """Run `function(*args, **kwargs)` when `kind` has a token, retrying after flood waits
+
+        `before_retry` is awaited after a flood wait; returning False drops the call
+        and makes this return None.
+        """
+        while True:
+            await self.acquire(kind)
+            try:
+                return await function(*args, **kwargs)
+            except WAIT_ERRORS as e:
+                self.flood(kind, e.seconds)
+            if before_retry is not None:
+                await self.acquire_after_flood(kind)
+                if not await before_retry():
+                    self.counters[f"{kind}_dropped"] += 1
+                    return None
+
+    async def acquire_after_flood(self, kind):
+        """Sleep out a flood wait without taking a token"""
+        delay = self.blocked_until[kind] - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def stats(self):
+        return dict(self.counters)
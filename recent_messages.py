@@ -0,0 +1,60 @@
+import logging
+import time
+from collections import deque
+from classifier import CLICK_KINDS, EventKind
+from config import *
+
+logger = logging.getLogger(__name__)
+
+# kinds that say whether a battle is on; everything else is ignored
+_BATTLE_KINDS = CLICK_KINDS | {EventKind.PRIZE, EventKind.FORFEIT}
+
+
+def message_age(message):
+    """Seconds since the message was sent or last edited"""
+    date = message.edit_date or message.date
+    if date is None:
+        return 0.0
+    if not isinstance(date, (int, float)):
+        date = date.timestamp()
+    return max(0.0, time.time() - date)
+
+
+class RecentMessages:
+    """The last few HeXamonbot messages, already classified, fed by the live handlers
+
+    Answers "is a battle running?" from memory. After a gap in the update
+    stream (startup, reconnect) it cannot be trusted until backfilled from the
+    network once.
+    """
+
+    def __init__(self, size=RECENT_MESSAGES_SIZE, active_window=RECENT_BATTLE_WINDOW):
+        self.entries = deque(maxlen=size)
+        self.active_window = active_window
+        self.needs_backfill = True
+        self.memory_checks = 0
+        self.network_checks = 0
+
+    def add(self, now, msg_id, kind):
+        self.entries.append((now, msg_id, kind))
+
+    def mark_gap(self):
+        """Updates may have been missed; the next check goes to the network"""
+        self.needs_backfill = True
+
+    def backfilled(self, messages):
+        """Replace the buffer with `messages`, (seen_at, msg_id, kind) oldest first"""
+        self.entries.clear()
+        self.entries.extend(messages)
+        self.needs_backfill = False
+        self.network_checks += 1
+
+    def battle_active(self, now):
+        """True if the newest battle message is a turn, not an ending, and is recent"""
+        for seen_at, _, kind in reversed(self.entries):
+            if kind in _BATTLE_KINDS:
+                return kind in CLICK_KINDS and now - seen_at < self.active_window
+        return False
+
+    def stats(self):
+        return {'memory': self.memory_checks, 'network': self.network_checks, 'buffered': len(self.entries)}
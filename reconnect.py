@@ -0,0 +1,79 @@
+import asyncio
+import logging
+from collections import Counter
+from retry import RetryPolicy
+from config import *
+
+logger = logging.getLogger(__name__)
+
+
+class ReconnectSupervisor:
+    """Waits for the client to disconnect, reconnects with backoff, then lets the bot catch up
+
+    `on_lost()` runs as soon as the connection drops and `on_restored(lost_at)`
+    (a coroutine) once it is back. Time to reconnect and to recover are
+    recorded as metrics stages.
+    """
+
+    def __init__(self, client, metrics, on_lost, on_restored, policy=None):
+        self.client = client
+        self.metrics = metrics
+        self.on_lost = on_lost
+        self.on_restored = on_restored
+        self.policy = policy or RetryPolicy(
+            base_delay=RECONNECT_BASE_DELAY,
+            factor=RETRY_BACKOFF_FACTOR,
+            max_delay=RECONNECT_MAX_DELAY,
+            jitter=RETRY_JITTER
+        )
+        self.counters = Counter()
+        self.last_recovery = None
+
+    async def watch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await self.client.disconnected
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # the connection died with an error; still a disconnect
+                logger.warning(f"🔌 Connection lost with error: {e}")
+            lost_at = loop.time()
+            clock_lost_at = self.metrics.clock()
+            self.counters['disconnects'] += 1
+            logger.warning("🔌 Disconnected from Telegram, reconnecting...")
+            self.on_lost()
+            await self.reconnect()
+            self.metrics.observe('disconnected_to_reconnected', self.metrics.clock() - clock_lost_at)
+            try:
+                await self.on_restored(lost_at)
+            except Exception as e:
+                logger.error(f"❌ Error catching up after reconnect: {e}")
+            recovery = self.metrics.clock() - clock_lost_at
+            self.metrics.observe('disconnected_to_recovered', recovery)
+            self.last_recovery = recovery
+            logger.info(f"🔌 Recovered in {recovery:.1f}s")
+
+    async def reconnect(self):
+        attempt = 0
+        while True:
+            self.counters['attempts'] += 1
+            try:
+                await self.client.connect()
+                if self.client.is_connected():
+                    self.counters['reconnects'] += 1
+                    return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"🔌 Reconnect attempt {attempt + 1} failed: {e}")
+            delay = self.policy.delay(attempt)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def stats(self):
+        stats = dict(self.counters)
+        if self.last_recovery is not None:
+            stats['last_recovery_s'] = round(self.last_recovery, 1)
+        return stats
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import random
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+class RetryableError(Exception):
+    """Raised by an attempt to ask the engine for another try"""
+
+    def __init__(self, reason, message=None):
+        super().__init__(message or reason)
+        self.reason = reason
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter"""
+
+    def __init__(self, base_delay=1.0, factor=2.0, max_delay=30.0, jitter=0.5, rng=None):
+        self.base_delay = base_delay
+        self.factor = factor
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+
+    def delay(self, attempt):
+        """Delay before retry number `attempt` (0 based)"""
+        delay = min(self.max_delay, self.base_delay * (self.factor ** attempt))
+        # keep (1 - jitter) of the delay and randomise the rest
+        return delay * (1 - self.jitter) + self.rng.uniform(0, delay * self.jitter)
+
+
+class RetryEngine:
+    """Runs an attempt in a loop until it succeeds, the deadline passes or it is cancelled"""
+
+    def __init__(self, policy=None):
+        self.policy = policy or RetryPolicy()
+        self.counters = Counter()
+        self._generation = 0
+        self._wake = asyncio.Event()
+
+    def cancel(self):
+        """Stop every run that is currently retrying (e.g. the battle ended)"""
+        self._generation += 1
+        self._wake.set()
+        self._wake = asyncio.Event()
+
+    def stats(self):
+        return dict(self.counters)
+
+    async def run(self, attempt, deadline=None):
+        """Call `attempt(try_number)` until it returns; returns None when given up"""
+        loop = asyncio.get_running_loop()
+        generation = self._generation
+        wake = self._wake
+        tries = 0
+        while True:
+            try:
+                return await attempt(tries)
+            except RetryableError as e:
+                reason = e.reason
+
+            self.counters[reason] += 1
+            if generation != self._generation:
+                self.counters['cancelled'] += 1
+                logger.info(f"🛑 Retry cancelled after {reason}")
+                return None
+
+            delay = self.policy.delay(tries)
+            if deadline is not None and loop.time() + delay > deadline:
+                self.counters['deadline'] += 1
+                logger.warning(f"⌛ Giving up after {tries + 1} attempts ({reason}), battle deadline reached")
+                return None
+
+            tries += 1
+            logger.info(f"🔄 Retrying in {delay:.1f}s after {reason} (attempt {tries + 1})")
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            if generation != self._generation:
+                self.counters['cancelled'] += 1
+                logger.info("🛑 Retry cancelled, battle is over")
+                return None
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import logging
+from config import *
+from main import BlisseyBot
+from session_store import open_session
+
+logger = logging.getLogger(__name__)
+
+
+def load_accounts(path):
+    """Load account entries from a JSON list, filling in defaults from config.py"""
+    with open(path, 'r') as f:
+        entries = json.load(f)
+
+    accounts = []
+    for index, entry in enumerate(entries):
+        name = entry.get('name') or f"account{index + 1}"
+        accounts.append({
+            'name': name,
+            'api_id': entry.get('api_id', API_ID),
+            'api_hash': entry.get('api_hash', API_HASH),
+            'session': entry.get('session', f"{name}.session"),
+            'session_string': entry.get('session_string'),
+            'attack_row': entry.get('attack_row', BATTLE_BUTTON_ROW),
+            'attack_col': entry.get('attack_col', BATTLE_BUTTON_COL),
+            'auto_run': entry.get('auto_run', AUTO_RUN),
+            'targets': entry.get('targets'),
+        })
+    logger.info(f"📒 Loaded {len(accounts)} accounts from {path}")
+    return accounts
+
+
+def build_bot(account):
+    session_file = account.get('session', f"{account['name']}.session")
+    session = open_session(account['name'], session_file, account.get('session_string'))
+    return BlisseyBot(
+        account['api_id'],
+        account['api_hash'],
+        session_file=session,
+        name=account['name'],
+        attack_row=account['attack_row'],
+        attack_col=account['attack_col'],
+        auto_run=account.get('auto_run', AUTO_RUN),
+        targets=account.get('targets')
+    )
+
+
+class MultiAccountRunner:
+    """Runs one BlisseyBot per account on a single event loop"""
+
+    def __init__(self, accounts):
+        self.bots = {}
+        for account in accounts:
+            if account['name'] in self.bots:
+                raise ValueError(f"duplicate account name: {account['name']}")
+            self.bots[account['name']] = build_bot(account)
+
+    async def run_account(self, bot):
+        # one account crashing must never take the others down
+        try:
+            await bot.start()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            bot.last_error = f"crashed: {e}"
+            logger.error(f"❌ [{bot.name}] account crashed: {e}")
+
+    def status(self):
+        return [bot.status() for bot in self.bots.values()]
+
+    def format_status(self):
+        rows = self.status()
+        connected = sum(1 for row in rows if row['connected'])
+        running = sum(1 for row in rows if row['automation'])
+        lines = [f"📊 {len(rows)} accounts, {connected} connected, {running} running"]
+        for row in rows:
+            line = f"  {row['name']:<16} {row['state']:<15} {'on' if row['automation'] else 'off':<4}"
+            if row['last_error']:
+                line += f" ⚠️ {row['last_error']}"
+            lines.append(line)
+        return "\n".join(lines)
+
+    async def report_status(self, interval=STATUS_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            logger.info(self.format_status())
+
+    async def run(self):
+        tasks = [asyncio.create_task(self.run_account(bot)) for bot in self.bots.values()]
+        reporter = asyncio.create_task(self.report_status())
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            reporter.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.info(self.format_status())
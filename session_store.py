@@ -0,0 +1,118 @@
+import asyncio
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+from telethon.sessions import SQLiteSession, StringSession
+from telethon.tl import types
+from atomic_file import atomic_write_json
+from config import *
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotSession(StringSession):
+    """An in-memory session that snapshots itself to a JSON file
+
+    Updates and entities only touch memory. Telethon calls save() about once a
+    minute (and on disconnect); that writes auth key, update state and entities
+    to `path` atomically, from a worker thread when an event loop is running.
+    """
+
+    def __init__(self, path, string=None):
+        self.path = path
+        snapshot = self.read_snapshot(path)
+        super().__init__(snapshot.get('auth') if snapshot else string)
+        if snapshot:
+            for entity_id, (pts, qts, date, seq) in snapshot.get('update_states', {}).items():
+                date = datetime.datetime.fromtimestamp(date, tz=datetime.timezone.utc)
+                self._update_states[int(entity_id)] = types.updates.State(pts, qts, date, seq, unread_count=0)
+            self._entities = {tuple(row) for row in snapshot.get('entities', [])}
+        self.write_lock = threading.Lock()
+        self.taken = 0
+        self.written = 0
+        self.pending_write = None
+
+    @staticmethod
+    def read_snapshot(path):
+        try:
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.error(f"error loading session snapshot: {e}")
+        return None
+
+    @classmethod
+    def from_sqlite(cls, path, sqlite_file):
+        """Start from an existing .session file, keeping its login, update state and entities"""
+        old = SQLiteSession(sqlite_file)
+        session = cls(path, StringSession.save(old))
+        for entity_id, state in old.get_update_states():
+            session._update_states[entity_id] = state
+        conn = sqlite3.connect(old.filename)
+        try:
+            session._entities = set(conn.execute("SELECT id, hash, username, phone, name FROM entities"))
+        finally:
+            conn.close()
+            old.close()
+        logger.info(f"💾 Imported {sqlite_file} into an in-memory session")
+        return session
+
+    def snapshot(self):
+        """Everything needed to resume as plain JSON types, numbered so an older one never overwrites a newer one"""
+        self.taken += 1
+        return self.taken, {
+            'auth': StringSession.save(self) if self.auth_key else None,
+            'update_states': {
+                str(entity_id): [state.pts, state.qts, state.date.timestamp(), state.seq]
+                for entity_id, state in self._update_states.items()
+            },
+            'entities': [list(row) for row in self._entities],
+        }
+
+    def write_snapshot(self, number, snapshot):
+        with self.write_lock:
+            if number <= self.written:
+                return
+            self.write_locked(snapshot)
+            self.written = number
+
+    def write_locked(self, snapshot):
+        try:
+            atomic_write_json(self.path, snapshot, separators=(',', ':'))
+        except Exception as e:
+            logger.error(f"Error writing session snapshot: {e}")
+
+    def save(self):
+        # the snapshot is taken here, on the loop thread; only the write moves off it
+        number, snapshot = self.snapshot()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.write_snapshot(number, snapshot)
+            return
+        if self.pending_write is None or self.pending_write.done():
+            self.pending_write = loop.run_in_executor(None, self.write_snapshot, number, snapshot)
+
+    def close(self):
+        # waits for a write still running on the worker thread, then writes the final state
+        self.write_snapshot(*self.snapshot())
+
+
+def open_session(name, session_file, session_string=None, backend=SESSION_BACKEND):
+    """The session a BlisseyBot should use for this account
+
+    "sqlite" keeps Telethon's .session file (or a plain StringSession when a
+    session string is given); "memory" uses a SnapshotSession, seeded from the
+    session string or an existing .session file on first use.
+    """
+    if backend != "memory":
+        return StringSession(session_string) if session_string else session_file
+    path = SESSION_SNAPSHOT_FILE.format(name=name)
+    sqlite_file = session_file if session_file.endswith('.session') else f"{session_file}.session"
+    if not os.path.exists(path) and not session_string and os.path.exists(sqlite_file):
+        return SnapshotSession.from_sqlite(path, session_file)
+    return SnapshotSession(path, session_string)
@@ -0,0 +1,527 @@
+"""Local stand-in for Telegram and HeXamonbot
+
+SimulatedClient implements the part of TelegramClient that BlisseyBot uses and
+routes it to a FakeHexamonbot, so the real process_message /
+click_battle_button / send_challenge_command code can run without an account.
+VirtualClockLoop lets hours of battles run in seconds.
+"""
+import asyncio
+import random
+import selectors
+import time
+from telethon import events, utils
+from telethon.errors import FloodWaitError
+from telethon.tl import types
+from telethon.tl.functions.messages import GetBotCallbackAnswerRequest
+from config import *
+
+CHANNEL_ID = 1500000530
+BOT_ID = 6121307474
+SELF_ID = 777000777
+
+OPPONENT = "Lucario"
+TOO_MANY_REQUESTS = "Receiving too many requests, please slow down."
+
+
+class LatencyProfile:
+    """Server behaviour knobs for one simulated run"""
+
+    def __init__(self, name, latency=0.25, jitter=0.1, too_many_rate=0.0, busy_rate=0.0,
+                 switch_rate=0.2, turns=(2, 4), forfeit_after=60, daily_limit_after=None,
+                 min_click_interval=0.5, battle_cooldown=1.0, flood_rate=0.0, flood_seconds=30,
+                 duplicate_rate=0.0, disconnect_every=None, outage=(5, 30), damage=None):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.too_many_rate = too_many_rate
+        self.busy_rate = busy_rate
+        self.switch_rate = switch_rate
+        self.turns = turns
+        self.forfeit_after = forfeit_after
+        # battles per virtual day before challenges get the daily-limit reply
+        self.daily_limit_after = daily_limit_after
+        # clicks sooner than this after a turn is shown get "too many requests"
+        self.min_click_interval = min_click_interval
+        # challenges sooner than this after a battle ends get "currently battling"
+        self.battle_cooldown = battle_cooldown
+        # chance that sending a message raises FloodWaitError(flood_seconds)
+        self.flood_rate = flood_rate
+        self.flood_seconds = flood_seconds
+        # chance that an update is delivered a second time moments later
+        self.duplicate_rate = duplicate_rate
+        # mean seconds between dropped connections (None = never) and how long
+        # the network stays unreachable afterwards; updates sent meanwhile are lost
+        self.disconnect_every = disconnect_every
+        self.outage = outage
+        # (low, high, accuracy) hits by move name; when given, Blissey faints once
+        # the pressed moves take its HP to 0 and `turns` is not used
+        self.damage = damage
+
+
+PROFILES = (
+    LatencyProfile("fast", latency=0.05, jitter=0.02),
+    LatencyProfile("normal", latency=0.25, jitter=0.1, too_many_rate=0.05, busy_rate=0.02),
+    LatencyProfile("congested", latency=1.0, jitter=0.5, too_many_rate=0.25, busy_rate=0.05,
+                   duplicate_rate=0.3),
+)
+
+
+class SimMessage:
+    """The subset of telethon's Message that the bot reads"""
+
+    def __init__(self, msg_id, text, sender, chat_id=-1000000000000 - CHANNEL_ID, reply_markup=None,
+                 reply_to_msg_id=None, out=False):
+        self.id = msg_id
+        self.text = text
+        self.raw_text = text
+        self.message = text
+        self.sender = sender
+        self.sender_id = sender.id
+        self.chat_id = chat_id
+        self.reply_markup = reply_markup
+        self.reply_to_msg_id = reply_to_msg_id
+        self.out = out
+        self.date = time.time()
+        self.edit_date = None
+
+    async def get_sender(self):
+        return self.sender
+
+
+class SimEvent:
+    def __init__(self, message, client):
+        self.message = message
+        self.client = client
+        self.sender_id = message.sender_id
+        self.chat_id = message.chat_id
+        self.text = message.text
+        self.raw_text = message.text
+        self.out = message.out
+        self.pattern_match = None
+
+    async def edit(self, text):
+        self.message.text = text
+
+    async def reply(self, text):
+        return await self.client.send_message(self.chat_id, text, reply_to=self.message.id)
+
+
+MOVES = ("Close Combat", "Extreme Speed", "Double-Edge", "Swords Dance")
+
+
+def battle_keyboard():
+    return types.ReplyInlineMarkup([
+        types.KeyboardButtonRow([
+            types.KeyboardButtonCallback(MOVES[row * 2 + col], f"move:{row * 2 + col}".encode())
+            for col in range(2)
+        ])
+        for row in range(2)
+    ])
+
+
+class SimPost:
+    """One challenge post: the Blissey behind it and the battle fought over it"""
+
+    def __init__(self, chat_id, message_id):
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.battle_message = None
+        self.turns_left = 0
+        self.hp = BLISSEY_MAX_HP
+        self.pressed = None
+        self.forfeit_timer = None
+        self.waiting_for_click = False
+        self.turn_shown_at = 0.0
+        self.battle_ended_at = None
+
+
+class FakeHexamonbot:
+    """Plays HeXamonbot's side of Blissey battles, one Blissey per challenge post"""
+
+    def __init__(self, client, profile, rng):
+        self.client = client
+        self.profile = profile
+        self.rng = rng
+        self.user = types.User(id=BOT_ID, access_hash=1, bot=True, username=BOT_USERNAME, first_name="HeXamon")
+        self.posts = {}
+        # battles count toward the daily limit until the next virtual midnight
+        self.day = 0
+        self.battles_today = 0
+        self.stats = {'challenges': 0, 'battles': 0, 'prizes': 0, 'forfeits': 0, 'busy': 0,
+                      'daily_limit': 0, 'too_many': 0, 'clicks': 0, 'stale_clicks': 0}
+
+    def delay(self):
+        return max(0.0, self.profile.latency + self.rng.uniform(-self.profile.jitter, self.profile.jitter))
+
+    def add_post(self, chat_id, message_id):
+        self.posts[chat_id, message_id] = SimPost(chat_id, message_id)
+
+    async def on_challenge(self, chat_id, reply_to, challenge_id):
+        post = self.posts.get((chat_id, reply_to))
+        if post is None:
+            # not a Blissey post, HeXamonbot ignores it
+            return
+        self.stats['challenges'] += 1
+        await asyncio.sleep(self.delay())
+        limit = self.profile.daily_limit_after
+        day = int(asyncio.get_running_loop().time() // (24 * 3600))
+        if day != self.day:
+            self.day, self.battles_today = day, 0
+        if limit is not None and self.battles_today >= limit:
+            self.stats['daily_limit'] += 1
+            self.client.post(DAILY_LIMIT_PATTERN + ". You can still battle but " + DAILY_LIMIT_NO_PRIZE_PATTERN + ".",
+                             chat_id=chat_id, reply_to=challenge_id)
+            return
+        now = asyncio.get_running_loop().time()
+        cooling = post.battle_ended_at is not None and now - post.battle_ended_at < self.profile.battle_cooldown
+        if post.battle_message is not None or cooling or self.rng.random() < self.profile.busy_rate:
+            self.stats['busy'] += 1
+            self.client.post(CURRENTLY_BATTLING_PATTERN + " someone else.", chat_id=chat_id, reply_to=challenge_id)
+            return
+        self.stats['battles'] += 1
+        self.battles_today += 1
+        post.turns_left = self.rng.randint(*self.profile.turns)
+        post.hp = BLISSEY_MAX_HP
+        post.battle_message = self.client.post(
+            f"{BATTLE_START_PATTERN}\n\nWild Blissey Lv. 100 [Normal]\nHP 714/714\n\n"
+            f"Current turn: {OPPONENT} Lv. 100 [Fighting/Steel]\nHP 344/344",
+            reply_markup=battle_keyboard(), chat_id=chat_id, reply_to=challenge_id
+        )
+        self.await_click(post)
+
+    def end_battle(self, post):
+        post.battle_message = None
+        post.waiting_for_click = False
+        post.battle_ended_at = asyncio.get_running_loop().time()
+
+    def await_click(self, post):
+        post.waiting_for_click = True
+        post.turn_shown_at = asyncio.get_running_loop().time()
+        if post.forfeit_timer:
+            post.forfeit_timer.cancel()
+        post.forfeit_timer = asyncio.get_running_loop().call_later(self.profile.forfeit_after, self.forfeit, post)
+
+    def forfeit(self, post):
+        if post.battle_message is None:
+            return
+        self.stats['forfeits'] += 1
+        self.end_battle(post)
+        self.client.post(f"{OPPONENT} {FORFEIT_PATTERN}", chat_id=post.chat_id)
+
+    def post_for(self, msg_id):
+        for post in self.posts.values():
+            if post.battle_message is not None and post.battle_message.id == msg_id:
+                return post
+        return None
+
+    async def on_callback(self, msg_id, data):
+        await asyncio.sleep(self.delay())
+        post = self.post_for(msg_id)
+        if post is None or not post.waiting_for_click:
+            self.stats['stale_clicks'] += 1
+            return types.messages.BotCallbackAnswer(cache_time=0, message="This battle is over.")
+        too_soon = asyncio.get_running_loop().time() - post.turn_shown_at < self.profile.min_click_interval
+        if too_soon or self.rng.random() < self.profile.too_many_rate:
+            self.stats['too_many'] += 1
+            return types.messages.BotCallbackAnswer(cache_time=0, message=TOO_MANY_REQUESTS)
+        self.stats['clicks'] += 1
+        post.pressed = MOVES[int(data.decode().rpartition(':')[2])]
+        post.waiting_for_click = False
+        post.forfeit_timer.cancel()
+        asyncio.get_running_loop().call_later(self.delay(), self.next_turn, post)
+        return types.messages.BotCallbackAnswer(cache_time=0)
+
+    def next_turn(self, post):
+        if post.battle_message is None:
+            return
+        if self.profile.damage:
+            self.hit(post)
+            return
+        post.turns_left -= 1
+        if post.turns_left <= 0:
+            self.stats['prizes'] += 1
+            self.end_battle(post)
+            self.client.post(f"{OPPONENT} used Close Combat!\nBlissey fainted!\n\n"
+                             f"You defeated Blissey.\n{PRIZE_PATTERN} 1,250 {PRIZE_CURRENCY}", chat_id=post.chat_id)
+            return
+        if self.rng.random() < self.profile.switch_rate:
+            text = BLISSEY_SWITCH_PATTERN
+        else:
+            text = f"{OPPONENT} used Close Combat!\n{BLISSEY_DOUBLE_EDGE_PATTERN} Double-Edge!"
+        text += f"\n\nBlissey Lv. 100 [Normal]\nHP {self.rng.randint(50, 700)}/714"
+        self.client.edit(post.battle_message, text)
+        self.await_click(post)
+
+    def hit(self, post):
+        """One turn of a battle decided by the damage of the pressed moves"""
+        low, high, accuracy = self.profile.damage.get(post.pressed, (0, 0, 1.0))
+        hit = self.rng.random() < accuracy
+        post.hp = max(0, post.hp - (self.rng.randint(low, high) if hit else 0))
+        text = f"{OPPONENT} used {post.pressed}!\n" + ("" if hit else "Blissey avoided the attack!\n")
+        if post.hp == 0:
+            self.stats['prizes'] += 1
+            self.end_battle(post)
+            self.client.post(f"{text}Blissey fainted!\n\nYou defeated Blissey.\n{PRIZE_PATTERN} 1,250 {PRIZE_CURRENCY}",
+                             chat_id=post.chat_id)
+            return
+        if self.rng.random() < self.profile.switch_rate:
+            text = BLISSEY_SWITCH_PATTERN
+        else:
+            text += f"{BLISSEY_DOUBLE_EDGE_PATTERN} Double-Edge!"
+        self.client.edit(post.battle_message, f"{text}\n\nBlissey Lv. 100 [Normal]\nHP {post.hp}/{BLISSEY_MAX_HP}")
+        self.await_click(post)
+
+
+class SimulatedClient:
+    """Just enough of TelegramClient for BlisseyBot, backed by FakeHexamonbot"""
+
+    def __init__(self, profile=None, seed=1, targets=None):
+        self.profile = profile or PROFILES[1]
+        self.rng = random.Random(seed)
+        self.me = types.User(id=SELF_ID, access_hash=2, is_self=True, username="simulated", first_name="Sim")
+        self.channel = types.Channel(id=CHANNEL_ID, title="JMD BLISSEY", photo=types.ChatPhotoEmpty(), date=None,
+                                     access_hash=3, username=TARGET_CHANNEL.lstrip('@'), megagroup=True)
+        self.channels = {self.channel.username: self.channel}
+        self.hexamonbot = FakeHexamonbot(self, self.profile, self.rng)
+        # (channel, message ID) challenge posts, each with its own Blissey
+        for channel, message_id in targets or [(TARGET_CHANNEL, TARGET_MESSAGE_ID)]:
+            username = channel.lstrip('@')
+            if username not in self.channels:
+                self.channels[username] = types.Channel(
+                    id=CHANNEL_ID + len(self.channels), title=username.replace('_', ' '), photo=types.ChatPhotoEmpty(),
+                    date=None, access_hash=3 + len(self.channels), username=username, megagroup=True)
+            self.hexamonbot.add_post(utils.get_peer_id(self.channels[username]), message_id)
+        self.handlers = []
+        self.history = []
+        self.next_id = TARGET_MESSAGE_ID + 1
+        self.connected = False
+        self.disconnected_future = None
+        self.outage_until = 0.0
+        self.drops = 0
+        self.delivered_at = {}
+        self.reaction_latencies = []
+        self.rpc_calls = 0
+        self.tasks = set()
+
+    # connection
+    async def start(self):
+        # connecting and checking authorization cost a round trip
+        await self.connect()
+        self.schedule_drop()
+        return self
+
+    async def connect(self):
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep(self.hexamonbot.delay())
+        if loop.time() < self.outage_until:
+            raise ConnectionError("network is unreachable")
+        self.connected = True
+        self.disconnected_future = loop.create_future()
+
+    async def disconnect(self):
+        self.lose_connection()
+
+    def is_connected(self):
+        return self.connected
+
+    @property
+    def disconnected(self):
+        if self.disconnected_future is None:
+            self.disconnected_future = asyncio.get_running_loop().create_future()
+            self.disconnected_future.set_result(None)
+        return asyncio.shield(self.disconnected_future)
+
+    def lose_connection(self):
+        self.connected = False
+        if self.disconnected_future is not None and not self.disconnected_future.done():
+            self.disconnected_future.set_result(None)
+
+    def schedule_drop(self):
+        if self.profile.disconnect_every:
+            asyncio.get_running_loop().call_later(self.rng.expovariate(1 / self.profile.disconnect_every), self.drop)
+
+    def drop(self):
+        """The network goes away for a while"""
+        if self.connected:
+            self.drops += 1
+            self.outage_until = asyncio.get_running_loop().time() + self.rng.uniform(*self.profile.outage)
+            self.lose_connection()
+        self.schedule_drop()
+
+    def require_connection(self):
+        if not self.connected:
+            # what Telethon raises for requests made while disconnected
+            raise ConnectionError("Cannot send requests while disconnected")
+
+    async def get_me(self, input_peer=False):
+        if input_peer:
+            return utils.get_input_peer(self.me)
+        self.rpc_calls += 1
+        await asyncio.sleep(self.hexamonbot.delay())
+        return self.me
+
+    async def get_entity(self, entity):
+        self.rpc_calls += 1
+        await asyncio.sleep(self.hexamonbot.delay())
+        for channel in self.channels.values():
+            if entity in ('@' + channel.username, channel.username, channel.id):
+                return channel
+        if entity in (BOT_USERNAME, '@' + BOT_USERNAME, BOT_ID):
+            return self.hexamonbot.user
+        raise ValueError(f"Cannot find any entity corresponding to {entity!r}")
+
+    async def get_input_entity(self, entity):
+        return utils.get_input_peer(await self.get_entity(entity))
+
+    # event handlers
+    def on(self, builder):
+        def decorator(callback):
+            self.add_event_handler(callback, builder)
+            return callback
+        return decorator
+
+    def add_event_handler(self, callback, builder):
+        self.handlers.append((builder, callback))
+
+    def _matches(self, builder, message, edited):
+        if edited != isinstance(builder, events.MessageEdited):
+            return False
+        if builder.chats is not None:
+            chats = builder.chats if isinstance(builder.chats, (list, tuple, set)) else [builder.chats]
+            ids = {c if isinstance(c, int) else utils.get_peer_id(c) for c in chats}
+            if (message.chat_id in ids) == builder.blacklist_chats:
+                return False
+        if builder.from_users is not None:
+            users = builder.from_users if isinstance(builder.from_users, (list, tuple, set)) else [builder.from_users]
+            if message.sender_id not in users:
+                return False
+        if builder.outgoing and not message.out or builder.incoming and message.out:
+            return False
+        if builder.pattern and not builder.pattern(message.text or ""):
+            return False
+        if builder.func and not builder.func(SimEvent(message, self)):
+            return False
+        return True
+
+    def dispatch(self, message, edited=False):
+        loop = asyncio.get_running_loop()
+        self.delivered_at[message.id] = loop.time()
+        self.deliver(message, edited)
+        if self.profile.duplicate_rate and self.rng.random() < self.profile.duplicate_rate:
+            loop.call_later(self.rng.uniform(0.05, 1.0), self.deliver, message, True)
+
+    def deliver(self, message, edited):
+        if not self.connected:
+            return
+        for builder, callback in self.handlers:
+            if self._matches(builder, message, edited):
+                self.spawn(callback(SimEvent(message, self)))
+
+    def spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    # HeXamonbot side
+    def chat_id(self, entity):
+        if isinstance(entity, int):
+            return entity
+        if isinstance(entity, str):
+            return utils.get_peer_id(self.channels[entity.lstrip('@')])
+        return utils.get_peer_id(entity)
+
+    def post(self, text, reply_markup=None, chat_id=None, reply_to=None):
+        chat_id = chat_id or utils.get_peer_id(self.channel)
+        message = SimMessage(self.next_id, text, self.hexamonbot.user, chat_id=chat_id, reply_markup=reply_markup,
+                             reply_to_msg_id=reply_to)
+        self.next_id += 1
+        self.history.append(message)
+        self.dispatch(message)
+        return message
+
+    def edit(self, message, text):
+        message.text = message.raw_text = message.message = text
+        message.edit_date = time.time()
+        self.dispatch(message, edited=True)
+
+    # account side
+    async def send_message(self, entity, text, reply_to=None):
+        self.rpc_calls += 1
+        self.require_connection()
+        await asyncio.sleep(self.hexamonbot.delay())
+        if self.rng.random() < self.profile.flood_rate:
+            self.hexamonbot.stats['flood_waits'] = self.hexamonbot.stats.get('flood_waits', 0) + 1
+            raise FloodWaitError(request=None, capture=self.profile.flood_seconds)
+        chat_id = self.chat_id(entity)
+        message = SimMessage(self.next_id, text, self.me, chat_id=chat_id, reply_to_msg_id=reply_to, out=True)
+        self.next_id += 1
+        self.history.append(message)
+        if text == CHALLENGE_COMMAND:
+            self.spawn(self.hexamonbot.on_challenge(chat_id, reply_to, message.id))
+        return message
+
+    async def iter_messages(self, entity, limit=None, min_id=0, **kwargs):
+        self.rpc_calls += 1
+        self.require_connection()
+        await asyncio.sleep(self.hexamonbot.delay())
+        chat_id = self.chat_id(entity)
+        count = 0
+        for message in reversed(self.history):
+            if message.id <= min_id or (limit is not None and count >= limit):
+                break
+            if message.chat_id != chat_id:
+                continue
+            count += 1
+            yield message
+
+    async def __call__(self, request):
+        self.rpc_calls += 1
+        self.require_connection()
+        if isinstance(request, GetBotCallbackAnswerRequest):
+            delivered = self.delivered_at.get(request.msg_id)
+            if delivered is not None:
+                self.reaction_latencies.append(asyncio.get_running_loop().time() - delivered)
+            return await self.hexamonbot.on_callback(request.msg_id, request.data)
+        await asyncio.sleep(self.hexamonbot.delay())
+        raise NotImplementedError(type(request).__name__)
+
+
+class _VirtualSelector:
+    """Polls real file descriptors without blocking and fast-forwards the clock instead"""
+
+    def __init__(self, loop, selector):
+        self.loop = loop
+        self.selector = selector
+
+    def select(self, timeout=None):
+        ready = self.selector.select(0)
+        if not ready and timeout:
+            self.loop.advance(timeout)
+        return ready
+
+    def __getattr__(self, name):
+        return getattr(self.selector, name)
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """Event loop whose clock jumps straight to the next timer"""
+
+    def __init__(self):
+        super().__init__(selectors.DefaultSelector())
+        self._virtual_time = 0.0
+        self._selector = _VirtualSelector(self, self._selector)
+
+    def time(self):
+        return self._virtual_time
+
+    def advance(self, seconds):
+        self._virtual_time += seconds
+
+
+def run_virtual(coro):
+    loop = VirtualClockLoop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import wait
+from config import *
+from retry import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+
+def shard_accounts(accounts, workers):
+    """Split accounts round-robin into at most `workers` non-empty shards"""
+    shards = [[] for _ in range(max(1, min(workers, len(accounts))))]
+    for index, account in enumerate(accounts):
+        shards[index % len(shards)].append(account)
+    return shards
+
+
+def worker_count(accounts, configured=WORKER_PROCESSES, per_worker=ACCOUNTS_PER_WORKER):
+    """Worker processes for `accounts`; by default one per `per_worker` accounts, up to the core count
+
+    A worker costs a whole interpreter while an account costs a few hundred
+    KiB, so small fleets stay in one process.
+    """
+    if configured:
+        workers = configured
+    else:
+        workers = min(os.cpu_count() or 1, -(-len(accounts) // per_worker))
+    return max(1, min(workers, len(accounts)))
+
+
+def run_worker(index, accounts, conn, interval):
+    """Worker process entry point: run a shard of accounts and report metrics"""
+    from runner import MultiAccountRunner
+    from logging_setup import setup_logging
+    # one rotating file per worker, processes must not rotate the same file
+    root, ext = os.path.splitext(LOG_FILE)
+    setup_logging(log_file=f"{root}.worker{index}{ext}" if LOG_FILE else None)
+
+    async def report(runner):
+        while True:
+            await asyncio.sleep(interval)
+            conn.send({'worker': index, 'pid': os.getpid(), 'time': time.time(), 'accounts': runner.status()})
+
+    async def serve():
+        runner = MultiAccountRunner(accounts)
+        reporter = asyncio.create_task(report(runner))
+        try:
+            await runner.run()
+        finally:
+            reporter.cancel()
+            conn.send({'worker': index, 'pid': os.getpid(), 'time': time.time(), 'accounts': runner.status()})
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+
+class Worker:
+    def __init__(self, index, accounts):
+        self.index = index
+        self.accounts = accounts
+        self.process = None
+        self.conn = None
+        self.restarts = 0
+        self.metrics = None
+        self.restart_at = None
+        # battles and prizes reported by earlier incarnations
+        self.carried = {'battles': 0, 'prizes': 0}
+
+    def totals(self):
+        accounts = self.metrics['accounts'] if self.metrics else []
+        return {
+            'battles': sum(a['events'].get('battle_start', 0) for a in accounts),
+            'prizes': sum(a['events'].get('prize', 0) for a in accounts),
+        }
+
+
+class Supervisor:
+    """Spreads accounts across worker processes and restarts the ones that exit while it runs"""
+
+    def __init__(self, accounts, workers=None, metrics_interval=STATUS_INTERVAL,
+                 restart_delay=WORKER_RESTART_DELAY):
+        workers = workers or worker_count(accounts)
+        self.workers = [Worker(i, shard) for i, shard in enumerate(shard_accounts(accounts, workers))]
+        self.metrics_interval = metrics_interval
+        # crash loops back off instead of restarting at a fixed rhythm
+        self.restart_policy = RetryPolicy(base_delay=restart_delay, max_delay=300)
+        self.context = multiprocessing.get_context('spawn')
+        self.started_at = time.monotonic()
+        self.is_running = False
+
+    def spawn(self, worker):
+        receiver, sender = self.context.Pipe(duplex=False)
+        worker.process = self.context.Process(
+            target=run_worker,
+            args=(worker.index, worker.accounts, sender, self.metrics_interval),
+            name=f"blissey-worker-{worker.index}",
+            daemon=True
+        )
+        worker.process.start()
+        sender.close()
+        worker.conn = receiver
+        worker.restart_at = None
+        logger.info(f"🧵 Worker {worker.index} started (pid {worker.process.pid}, "
+                    f"{len(worker.accounts)} accounts)")
+
+    def collect(self, worker):
+        try:
+            while worker.conn.poll():
+                worker.metrics = worker.conn.recv()
+        except (EOFError, OSError):
+            pass
+
+    def reap(self, worker):
+        """Handle a worker whose process exited; returns True if it will be restarted"""
+        self.collect(worker)
+        worker.process.join()
+        code = worker.process.exitcode
+        worker.conn.close()
+        worker.conn = None
+        if not self.is_running:
+            logger.info(f"🧵 Worker {worker.index} finished")
+            return False
+        for key, value in worker.totals().items():
+            worker.carried[key] += value
+        worker.metrics = None
+        delay = self.restart_policy.delay(worker.restarts)
+        worker.restarts += 1
+        worker.restart_at = time.monotonic() + delay
+        # a clean exit is no better: BlisseyBot.start() returns when its account
+        # cannot connect, so a worker whose accounts all failed exits with 0
+        what = "stopped" if code == 0 else f"crashed (exit code {code})"
+        logger.error(f"❌ Worker {worker.index} {what}, "
+                     f"restarting in {delay:.1f}s (restart #{worker.restarts})")
+        return True
+
+    def metrics(self):
+        """Fleet totals built from the latest report of each worker"""
+        hours = max(time.monotonic() - self.started_at, 1) / 3600
+        totals = {'workers': len(self.workers), 'alive': 0, 'restarts': 0,
+                  'accounts': 0, 'running': 0, 'battles': 0, 'prizes': 0}
+        per_worker = []
+        for worker in self.workers:
+            alive = worker.process is not None and worker.process.is_alive()
+            totals['alive'] += alive
+            totals['restarts'] += worker.restarts
+            accounts = worker.metrics['accounts'] if worker.metrics else []
+            current = worker.totals()
+            battles = current['battles'] + worker.carried['battles']
+            prizes = current['prizes'] + worker.carried['prizes']
+            totals['accounts'] += len(worker.accounts)
+            totals['running'] += sum(1 for a in accounts if a['automation'])
+            totals['battles'] += battles
+            totals['prizes'] += prizes
+            per_worker.append({'worker': worker.index, 'alive': alive, 'restarts': worker.restarts,
+                               'accounts': len(worker.accounts), 'battles': battles, 'prizes': prizes})
+        totals['battles_per_hour'] = totals['battles'] / hours
+        totals['per_worker'] = per_worker
+        return totals
+
+    def format_metrics(self):
+        m = self.metrics()
+        lines = [f"🏭 {m['alive']}/{m['workers']} workers alive, {m['accounts']} accounts, "
+                 f"{m['running']} running, {m['battles']} battles ({m['battles_per_hour']:.0f}/h), "
+                 f"{m['prizes']} prizes, {m['restarts']} restarts"]
+        for w in m['per_worker']:
+            lines.append(f"  worker {w['worker']}: {'up' if w['alive'] else 'down'}, {w['accounts']} accounts, "
+                         f"{w['battles']} battles, {w['prizes']} prizes, {w['restarts']} restarts")
+        return "\n".join(lines)
+
+    async def run(self):
+        self.is_running = True
+        for worker in self.workers:
+            self.spawn(worker)
+        last_report = time.monotonic()
+        try:
+            while self.is_running:
+                live = [w for w in self.workers if w.conn is not None]
+                pending = [w for w in self.workers if w.restart_at is not None]
+                if not live and not pending:
+                    break
+
+                objects = [w.conn for w in live] + [w.process.sentinel for w in live]
+                ready = await asyncio.to_thread(wait, objects, 1.0) if objects else []
+                if not objects:
+                    await asyncio.sleep(1.0)
+
+                for worker in live:
+                    if worker.conn in ready:
+                        self.collect(worker)
+                    if worker.process.sentinel in ready:
+                        self.reap(worker)
+
+                now = time.monotonic()
+                for worker in pending:
+                    if now >= worker.restart_at:
+                        self.spawn(worker)
+
+                if now - last_report >= self.metrics_interval:
+                    last_report = now
+                    logger.info(self.format_metrics())
+        finally:
+            self.stop()
+            logger.info(self.format_metrics())
+
+    def stop(self):
+        self.is_running = False
+        for worker in self.workers:
+            if worker.process is not None and worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join(5)
@@ -0,0 +1,74 @@
+import logging
+from collections import deque
+from battle_state import BattleState, BattleStateMachine
+from peer_cache import PeerCache
+from recent_messages import RecentMessages
+from config import *
+
+logger = logging.getLogger(__name__)
+
+# states in which a post is busy with this account and must not be challenged again
+_BUSY_STATES = (BattleState.CHALLENGE_SENT, BattleState.IN_BATTLE)
+
+
+def load_targets(entries=None):
+    """(channel, message_id) pairs from TARGETS-style entries, in order, without repeats"""
+    targets = []
+    for entry in entries or TARGETS:
+        if isinstance(entry, dict):
+            target = (entry.get('channel', TARGET_CHANNEL), int(entry.get('message_id', TARGET_MESSAGE_ID)))
+        else:
+            target = (entry[0], int(entry[1]))
+        if target not in targets:
+            targets.append(target)
+    return targets
+
+
+class BattleTarget:
+    """One challenge post and everything about the battles fought on it
+
+    Each post has its own battle state machine and timer, recent messages
+    buffer and cached peers, so an account can leave a post that is cooling
+    down and challenge another one meanwhile.
+    """
+
+    def __init__(self, client, account, channel, message_id, bot_username=BOT_USERNAME, peer_path=None):
+        self.channel_ref = channel
+        self.message_id = message_id
+        self.label = f"{channel} #{message_id}"
+        self.peers = PeerCache(client, channel, bot_username, path=peer_path)
+        self.battle = BattleStateMachine(f"{account} {self.label}")
+        self.recent = RecentMessages()
+        self.awaiting_battle = False
+        self.battle_deadline = None
+        self.battle_started_at = None
+        self.battle_turns = 0
+        # the newest battle turn, so a restart mid-battle can click instead of challenging
+        self.last_turn_message = None
+        self.last_state = None
+        # newest HeXamonbot message ID handled, where a catch-up after a reconnect starts
+        self.last_seen_id = 0
+        # HeXamonbot message IDs process_message handled; only edits of these are
+        # replayed after a reconnect, not messages merely backfilled at startup
+        self.handled_ids = deque(maxlen=RECENT_MESSAGES_SIZE)
+        # loop time from which the post may be challenged again
+        self.ready_at = 0.0
+        # our last /challenge message; HeXamonbot's battle replies point at it
+        self.last_challenge_id = None
+        # HeXamonbot's message for our current battle; its turns are edits of it
+        self.battle_message_id = None
+        self.battles = 0
+
+    @property
+    def busy(self):
+        return self.battle.state in _BUSY_STATES
+
+    def rest(self, now, seconds):
+        """Leave the post alone for `seconds`"""
+        self.ready_at = now + seconds
+
+    def describe(self, now):
+        line = f"{self.label}: {self.battle.state.value}, {self.battles} battles"
+        if self.ready_at > now and not self.busy:
+            line += f", ready in {self.ready_at - now:.0f}s"
+        return line
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from collections import Counter, OrderedDict
+from config import *
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateDeduper:
+    """Drops repeated updates and folds bursts of edits to one message into one
+
+    An update is a repeat when its message ID, edit date and text were already
+    seen; the last `size` of those are remembered. Updates to a message that is
+    still inside its `window` only replace the pending event, so the handler
+    runs once with the latest content.
+    """
+
+    def __init__(self, window=UPDATE_COALESCE_WINDOW, size=UPDATE_DEDUPE_SIZE, would_click=None):
+        self.window = window
+        self.size = size
+        # tells apart dropped updates that would have led to a click
+        self.would_click = would_click
+        self.seen = OrderedDict()
+        self.pending = {}
+        self.counters = Counter()
+
+    def is_repeat(self, message):
+        key = (message.chat_id, message.id, message.edit_date, hash(message.text))
+        if key in self.seen:
+            self.seen.move_to_end(key)
+            return True
+        self.seen[key] = None
+        if len(self.seen) > self.size:
+            self.seen.popitem(last=False)
+        return False
+
+    def dropped(self, event, reason):
+        self.counters[reason] += 1
+        if self.would_click and self.would_click(event.message):
+            self.counters['clicks_suppressed'] += 1
+
+    async def submit(self, event, handler, trace=None):
+        """Run `handler(event, trace)` unless the update is a repeat or gets folded into a newer one
+
+        `trace` is started when the update arrives, so the time spent waiting
+        out the window is part of its latency; a folded update keeps the
+        trace of the first one.
+        """
+        message = event.message
+        if self.is_repeat(message):
+            self.dropped(event, 'duplicates')
+            return
+        if self.window <= 0:
+            await handler(event, trace)
+            return
+        key = (message.chat_id, message.id)
+        if key in self.pending:
+            # the earlier update is still waiting; this one replaces it
+            self.dropped(self.pending[key][0], 'coalesced')
+            self.pending[key] = (event, self.pending[key][1])
+            return
+        self.pending[key] = (event, trace)
+        await asyncio.sleep(self.window)
+        await handler(*self.pending.pop(key))
+
+    def stats(self):
+        return dict(self.counters)